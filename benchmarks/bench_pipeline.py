@@ -0,0 +1,238 @@
+# benchmarks/bench_pipeline.py
+# Times the batch pipeline on synthetic clips at several concurrency levels and writes the numbers as JSON.
+#
+#   python benchmarks/bench_pipeline.py --jobs 1 2 4 8 --channels 2 --output results.json
+#   python benchmarks/bench_pipeline.py --baseline old.json   # compare against an earlier run
+#   python benchmarks/bench_pipeline.py --profiles foreground background   # effect of the resource governor
+#
+# Each configuration runs in a fresh child process so CPU time and peak RSS aren't mixed between runs.
+# Alongside every run a stand-in for an NLE "plays back" at 25 fps (a few ms of CPU per frame, due on time), so
+# the results show how much the batch gets in the way of someone working on the same machine.
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine import ConversionEngine, ProbeCache, ThroughputHistory, default_job_count  # noqa: E402
+from fixtures import DEFAULT_DIR, build_fixtures  # noqa: E402
+from governor import PROFILES, ResourcePolicy  # noqa: E402
+
+RESULTS_VERSION = 2
+FRAME_SECONDS = 1 / 25
+FRAME_WORK = 0.008  # CPU seconds each frame needs
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def _peak_rss_mb(usage):
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+
+def playback():
+    # Runs in its own process until SIGTERM: does FRAME_WORK of CPU per frame and notes how late each frame was
+    stop = []
+    signal.signal(signal.SIGTERM, lambda *_: stop.append(True))
+    late = []
+    deadline = time.perf_counter() + FRAME_SECONDS
+    while not stop:
+        spent = time.thread_time()
+        while time.thread_time() - spent < FRAME_WORK:
+            pass
+        now = time.perf_counter()
+        late.append(max(now - deadline, 0.0))
+        if now < deadline:
+            time.sleep(deadline - now)
+            deadline += FRAME_SECONDS
+        else:
+            deadline = now + FRAME_SECONDS  # dropped; the next frame is due a frame from now
+    return {
+        "frames": len(late),
+        "dropped_percent": round(sum(1 for t in late if t > 0) / len(late) * 100, 2) if late else None,
+        "late_ms_p95": round(_percentile(late, 95) * 1000, 2) if late else None,
+        "late_ms_max": round(max(late) * 1000, 2) if late else None,
+    }
+
+
+def run_once(input_folder, channels, jobs, cached_probes=False, profile="foreground"):
+    # One measured pass of ConversionEngine.run(); meant to be called in a child process
+    output = tempfile.mkdtemp(prefix="proxymate-bench-out-")
+    cache_path = os.path.join(output, ".probe_cache.json")
+    # Throughput history and encoder timings stay in the temp folder too; the user's real ones feed --dry-run
+    # estimates and the encoder choice, and synthetic clips would overwrite them
+    caches = {
+        "history": ThroughputHistory(os.path.join(output, ".throughput.json")),
+        "encoder_cache": os.path.join(output, ".encoders.json"),
+    }
+    player = None
+    try:
+        if cached_probes:
+            warm = ConversionEngine(input_folder, output, channels, jobs, dry_run=True,
+                                    probe_cache=ProbeCache(cache_path), **caches)
+            warm.run()
+        engine = ConversionEngine(input_folder, output, channels, jobs, probe_cache=ProbeCache(cache_path),
+                                  resources=ResourcePolicy(profile), **caches)
+        engine.encoders.load()  # measured here rather than inside the timed run
+        player = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--_playback"],
+                                  stdout=subprocess.PIPE, text=True)
+
+        before_self = resource.getrusage(resource.RUSAGE_SELF)
+        before_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        started = time.perf_counter()
+        processed = engine.run()
+        wall = time.perf_counter() - started
+        # RUSAGE_CHILDREN only counts children once they're reaped, so taking it before reaping the player keeps
+        # the player's CPU and memory out of the ffmpeg numbers
+        after_self = resource.getrusage(resource.RUSAGE_SELF)
+        after_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        player.terminate()
+        playback_stats = json.loads(player.communicate()[0].strip().splitlines()[-1])
+        player = None
+
+        done = [r for r in engine.results if r["status"] in ("copied", "converted")]
+        latencies = [r["transcode_seconds"] for r in done]
+        probe_seconds = [r["probe_seconds"] for r in done]
+        bytes_in = sum(os.path.getsize(os.path.join(input_folder, r["file"])) for r in done)
+        cpu = lambda before, after: (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+        report = engine.report()
+        return {
+            "jobs": jobs,
+            "cached_probes": cached_probes,
+            "profile": profile,
+            "files": len(engine.results),
+            "processed": processed,
+            "failed": sum(1 for r in engine.results if r["status"] == "failed"),
+            "wall_seconds": round(wall, 3),
+            "files_per_second": round(processed / wall, 3) if wall else None,
+            "mb_per_second": round(bytes_in / wall / 1_000_000, 2) if wall else None,
+            "latency_seconds": {
+                "mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "max": max(latencies) if latencies else None,
+            },
+            "probe_seconds_total": round(sum(probe_seconds), 4),
+            "probe_seconds_mean": round(sum(probe_seconds) / len(probe_seconds), 4) if probe_seconds else None,
+            "cpu_seconds": {
+                "engine": round(cpu(before_self, after_self), 3),
+                "ffmpeg": round(cpu(before_children, after_children), 3),
+            },
+            "peak_rss_mb": {
+                "engine": _peak_rss_mb(after_self),
+                "ffmpeg_max": _peak_rss_mb(after_children),
+            },
+            "strategies": sorted({r.get("strategy") for r in done if r.get("strategy")}),
+            "playback": playback_stats,
+            "governor": {
+                "lowest_share": report["resources"]["lowest_share"],
+                "backoffs": report["resources"]["backoffs"],
+            },
+        }
+    finally:
+        if player:
+            player.kill()
+        shutil.rmtree(output, ignore_errors=True)
+
+
+def run_isolated(input_folder, channels, jobs, cached_probes=False, profile="foreground"):
+    cmd = [sys.executable, os.path.abspath(__file__), "--_child", input_folder,
+           "--channels", str(channels), "--jobs", str(jobs), "--profiles", profile]
+    if cached_probes:
+        cmd.append("--cached-probes")
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(current, baseline):
+    # Prints wall-clock change per configuration; positive means slower than the baseline
+    key = lambda r: (r["jobs"], r["cached_probes"], r.get("profile", "foreground"))
+    old = {key(r): r for r in baseline.get("runs", [])}
+    for run in current["runs"]:
+        ref = old.get(key(run))
+        if not ref:
+            continue
+        change = (run["wall_seconds"] - ref["wall_seconds"]) / ref["wall_seconds"] * 100
+        dropped = ""
+        if run.get("playback") and ref.get("playback"):
+            dropped = f"  dropped frames {ref['playback']['dropped_percent']}% → {run['playback']['dropped_percent']}%"
+        print(f"jobs={run['jobs']:<3} cached={str(run['cached_probes']):<5} {run.get('profile', 'foreground'):<10} "
+              f"{ref['wall_seconds']:8.2f}s → {run['wall_seconds']:8.2f}s  ({change:+.1f}%){dropped}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ProxyMate conversion pipeline on synthetic clips.")
+    parser.add_argument("--jobs", type=int, nargs="+", default=sorted({1, 2, 4, default_job_count()}))
+    parser.add_argument("--channels", type=int, default=2, help="target channel count (default: 2)")
+    parser.add_argument("--copies", type=int, default=4, help="copies of each fixture clip (default: 4)")
+    parser.add_argument("--fixtures", default=DEFAULT_DIR, help="where synthetic clips are generated and reused")
+    parser.add_argument("--cached-probes", action="store_true", help="also measure runs with a warm probe cache")
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES), default=["foreground"],
+                        help="resource profiles to run each configuration with (default: foreground)")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--_child", help=argparse.SUPPRESS)
+    parser.add_argument("--_playback", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._playback:
+        print(json.dumps(playback()))
+        return 0
+    if args._child:
+        print(json.dumps(run_once(args._child, args.channels, args.jobs[0], args.cached_probes, args.profiles[0])))
+        return 0
+
+    build_fixtures(args.fixtures, copies=args.copies)
+    runs = []
+    for jobs in args.jobs:
+        for cached in ([False, True] if args.cached_probes else [False]):
+            for profile in args.profiles:
+                run = run_isolated(args.fixtures, args.channels, jobs, cached, profile)
+                print(f"jobs={jobs:<3} cached={str(cached):<5} {profile:<10} {run['wall_seconds']:8.2f}s  "
+                      f"{run['files_per_second']} files/s  p95 {run['latency_seconds']['p95']}s  "
+                      f"playback dropped {run['playback']['dropped_percent']}% "
+                      f"(p95 {run['playback']['late_ms_p95']}ms late)", file=sys.stderr)
+                runs.append(run)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "target_channels": args.channels,
+        "copies": args.copies,
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# benchmarks/bench_probe.py
+# Compares the two probe backends on the synthetic clips: the in-process MP4/MOV header parser vs one ffprobe per file.
+#
+#   python benchmarks/bench_probe.py --rounds 5 --output probe.json
+#
+# Also checks that both backends agree on everything the planner uses (stream types, codecs, channels, duration).
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine import ConversionEngine, ProbeCache  # noqa: E402
+from fixtures import DEFAULT_DIR, build_fixtures  # noqa: E402
+from mp4probe import UnsupportedMedia, probe_mp4  # noqa: E402
+
+RESULTS_VERSION = 1
+DURATION_TOLERANCE = 0.05  # seconds; edit lists can shift the last frame between the two
+
+
+def _summary(info):
+    return [(s["codec_type"], s["codec_name"], s["channels"]) for s in info["streams"]]
+
+
+def compare_backends(native, reference):
+    # Differences that would change a plan, as strings; empty if the two agree
+    problems = []
+    ours = [s for s in _summary(native) if s[0] in ("audio", "video")]
+    theirs = [s for s in _summary(reference) if s[0] in ("audio", "video")]
+    if ours != theirs:
+        problems.append(f"streams {ours} != {theirs}")
+    if abs((native["duration"] or 0) - (reference["duration"] or 0)) > DURATION_TOLERANCE:
+        problems.append(f"duration {native['duration']} != {reference['duration']}")
+    return problems
+
+
+def time_backend(probe, paths, rounds):
+    # Best-of-rounds wall time for probing every path once
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for path in paths:
+            probe(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the native MP4/MOV probe against ffprobe.")
+    parser.add_argument("--copies", type=int, default=4, help="copies of each fixture clip (default: 4)")
+    parser.add_argument("--fixtures", default=DEFAULT_DIR, help="where synthetic clips are generated and reused")
+    parser.add_argument("--rounds", type=int, default=3, help="passes per backend; the best one counts (default: 3)")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    paths = build_fixtures(args.fixtures, copies=args.copies)
+    scratch = tempfile.mkdtemp(prefix="proxymate-bench-probe-")
+    engine = ConversionEngine(args.fixtures, scratch, 2, dry_run=True,
+                              probe_cache=ProbeCache(os.path.join(scratch, "probe_cache.json")), probe_backend="ffprobe")
+
+    mismatches = {}
+    unsupported = {}
+    for path in paths:
+        reference = engine._ffprobe(path)
+        try:
+            problems = compare_backends(probe_mp4(path), reference)
+        except UnsupportedMedia as e:
+            unsupported[os.path.basename(path)] = str(e)
+            continue
+        if problems:
+            mismatches[os.path.basename(path)] = problems
+
+    ffprobe_seconds = time_backend(engine._ffprobe, paths, args.rounds)
+    native_seconds = time_backend(probe_mp4, [p for p in paths if os.path.basename(p) not in unsupported], args.rounds)
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "files": len(paths),
+        "ffprobe_ms_per_file": round(ffprobe_seconds / len(paths) * 1000, 3),
+        "native_ms_per_file": round(native_seconds / max(len(paths) - len(unsupported), 1) * 1000, 3),
+        "speedup": round(ffprobe_seconds / native_seconds, 1) if native_seconds else None,
+        "unsupported": unsupported,
+        "mismatches": mismatches,
+    }
+    print(f"ffprobe {results['ffprobe_ms_per_file']:.2f} ms/file, native {results['native_ms_per_file']:.3f} ms/file "
+          f"({results['speedup']}x), {len(unsupported)} unsupported, {len(mismatches)} mismatched", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# benchmarks/bench_shared.py
+# Runs several `cli.py --shared` workers on this machine against one batch of synthetic clips and checks that every
+# file was converted exactly once.
+#
+#   python benchmarks/bench_shared.py --workers 3 --output shared.json
+#   python benchmarks/bench_shared.py --workers 3 --stall   # freeze one worker past its lease to exercise takeover
+#
+# Exits non-zero if any file was converted twice or not at all.
+import argparse
+import collections
+import glob
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fixtures import DEFAULT_DIR, build_fixtures  # noqa: E402
+
+RESULTS_VERSION = 1
+
+
+def start_worker(input_folder, output, shared, channels, jobs, lease):
+    cmd = [sys.executable, os.path.join(ROOT, "cli.py"), input_folder, output, "--channels", str(channels),
+           "--jobs", str(jobs), "--shared", shared, "--lease", str(lease), "--quiet"]
+    return subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+
+
+def check_once(reports, expected):
+    # Which files were converted more than once, and which by nobody
+    converted = collections.Counter(
+        r["file"] for report in reports for r in report["results"] if r["status"] in ("converted", "copied")
+    )
+    return sorted(f for f, n in converted.items() if n > 1), sorted(set(expected) - set(converted))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run several shared-batch workers on one host and check the split.")
+    parser.add_argument("--workers", type=int, default=3, help="worker processes (default: 3)")
+    parser.add_argument("--jobs", type=int, default=2, help="--jobs for each worker (default: 2)")
+    parser.add_argument("--channels", type=int, default=2, help="target channel count (default: 2)")
+    parser.add_argument("--copies", type=int, default=4, help="copies of each fixture clip (default: 4)")
+    parser.add_argument("--fixtures", default=DEFAULT_DIR, help="where synthetic clips are generated and reused")
+    parser.add_argument("--lease", type=float, default=5.0, help="claim lease in seconds (default: 5)")
+    parser.add_argument("--stall", action="store_true",
+                        help="SIGSTOP the first worker shortly after it starts and resume it once the others finish")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    paths = build_fixtures(args.fixtures, copies=args.copies)
+    expected = [os.path.relpath(p, args.fixtures) for p in paths]
+    scratch = tempfile.mkdtemp(prefix="proxymate-bench-shared-")
+    output = os.path.join(scratch, "out")
+    shared = os.path.join(scratch, "claims")
+
+    started = time.perf_counter()
+    workers = [start_worker(args.fixtures, output, shared, args.channels, args.jobs, args.lease)
+               for _ in range(args.workers)]
+    if args.stall:
+        time.sleep(min(args.lease / 2, 2.0))
+        workers[0].send_signal(signal.SIGSTOP)
+    for worker in workers[1 if args.stall else 0:]:
+        worker.wait()
+    if args.stall:
+        workers[0].send_signal(signal.SIGCONT)
+        workers[0].wait()
+    wall = time.perf_counter() - started
+
+    reports = []
+    for path in glob.glob(os.path.join(output, ".proxymate-reports", "run-*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            reports.append(json.load(f))
+    twice, missing = check_once(reports, expected)
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "files": len(expected),
+        "workers": args.workers,
+        "stalled": args.stall,
+        "wall_seconds": round(wall, 3),
+        "exit_codes": [w.returncode for w in workers],
+        "per_worker": {
+            r["shared"]["worker"]: {"processed": r["processed"], "reclaimed": r["shared"]["reclaimed"]}
+            for r in reports if r.get("shared")
+        },
+        "converted_twice": twice,
+        "missing": missing,
+    }
+    print(f"{len(expected)} files, {args.workers} workers, {wall:.2f}s; "
+          f"{len(twice)} converted twice, {len(missing)} missing", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return 1 if twice or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# benchmarks/bench_startup.py
+# Times ProxyMate's window startup (imports, window construction, first paint) over several fresh launches.
+#
+#   python benchmarks/bench_startup.py --runs 10 --output startup.json
+#   python benchmarks/bench_startup.py --baseline old.json    # compare against an earlier run
+#   python benchmarks/bench_startup.py --profile startup.prof # cProfile one launch and print the top entries
+#
+# Each launch is a new interpreter, so import and asset costs are paid every time, as they are for users.
+# Runs on Qt's offscreen platform by default so it works without a display.
+import argparse
+import json
+import os
+import platform
+import pstats
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESULTS_VERSION = 1
+PHASES = ("imports", "window", "first_paint", "since_spawn")
+
+
+def launch_once():
+    # Runs in the child: builds the real window and reports how long each step took, in seconds
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)  # assets are resolved relative to the working directory outside the app bundle
+    import main
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+    from PyQt5.QtWidgets import QApplication
+    imported = time.perf_counter()
+
+    app = QApplication(sys.argv[:1])
+    marks = {}
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and "first_paint" not in marks:
+                marks["first_paint"] = time.perf_counter()
+                marks["first_paint_wall"] = time.time()
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    watcher = FirstPaint()
+    app.installEventFilter(watcher)
+    window = main.show_window()
+    built = time.perf_counter()
+    QTimer.singleShot(10_000, app.quit)  # never hang a benchmark on a window that doesn't paint
+    app.exec_()
+
+    if "first_paint" not in marks:
+        raise RuntimeError("window never painted")
+    window.close()
+    return {
+        "imports": imported - started,
+        "window": built - imported,
+        "first_paint": marks["first_paint"] - started,
+        "first_paint_wall": marks["first_paint_wall"],
+    }
+
+
+def run_isolated(qt_platform, profile=None):
+    env = dict(os.environ)
+    if qt_platform:
+        env["QT_QPA_PLATFORM"] = qt_platform
+    cmd = [sys.executable]
+    if profile:
+        cmd += ["-m", "cProfile", "-o", profile]
+    cmd += [os.path.abspath(__file__), "--_child"]
+    spawned = time.time()
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, text=True, check=True, env=env)
+    run = json.loads(result.stdout.strip().splitlines()[-1])
+    run["since_spawn"] = run.pop("first_paint_wall") - spawned
+    return {phase: round(run[phase], 4) for phase in PHASES}
+
+
+def summarize(runs):
+    return {
+        phase: {
+            "median": round(statistics.median(r[phase] for r in runs), 4),
+            "min": min(r[phase] for r in runs),
+            "max": max(r[phase] for r in runs),
+        }
+        for phase in PHASES
+    }
+
+
+def compare(current, baseline):
+    # Prints the median change per phase; positive means slower than the baseline
+    for phase in PHASES:
+        old = baseline.get("summary", {}).get(phase)
+        if not old:
+            continue
+        new = current["summary"][phase]
+        change = (new["median"] - old["median"]) / old["median"] * 100 if old["median"] else 0.0
+        print(f"{phase:<12} {old['median'] * 1000:8.1f}ms → {new['median'] * 1000:8.1f}ms  ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ProxyMate's time to first paint.")
+    parser.add_argument("--runs", type=int, default=5, help="number of launches (default: 5)")
+    parser.add_argument("--platform", default="offscreen",
+                        help="Qt platform plugin to launch with; empty for the system default (default: offscreen)")
+    parser.add_argument("--profile", metavar="PATH", help="cProfile one extra launch into PATH and print the top entries")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--_child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._child:
+        print(json.dumps(launch_once()))
+        return 0
+
+    runs = []
+    for i in range(args.runs):
+        run = run_isolated(args.platform)
+        print(f"launch {i + 1:<3} imports {run['imports'] * 1000:7.1f}ms  window {run['window'] * 1000:7.1f}ms  "
+              f"first paint {run['first_paint'] * 1000:7.1f}ms  ({run['since_spawn'] * 1000:.1f}ms since spawn)",
+              file=sys.stderr)
+        runs.append(run)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "qt_platform": args.platform or None,
+        "runs": runs,
+        "summary": summarize(runs),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.profile:
+        run_isolated(args.platform, profile=args.profile)
+        pstats.Stats(args.profile, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
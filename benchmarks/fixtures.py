@@ -0,0 +1,64 @@
+# benchmarks/fixtures.py
+# Synthetic proxy clips generated locally with ffmpeg's lavfi sources, so benchmarks never need real media
+import os
+import shutil
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import find_binary  # noqa: E402
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".fixtures")
+
+# (duration seconds, audio channels, container)
+DEFAULT_MATRIX = [
+    (2, 1, ".mp4"),
+    (2, 2, ".mov"),
+    (10, 2, ".mp4"),
+    (10, 6, ".mov"),
+    (30, 8, ".mov"),
+]
+
+
+def fixture_name(duration, channels, ext):
+    return f"synthetic_{duration}s_{channels}ch{ext}"
+
+
+def make_clip(path, duration, channels, ext, ffmpeg=None):
+    # Small mpeg4 video (always built in) + a tone upmixed to `channels`; PCM in .mov, AAC in .mp4 like real proxies
+    ffmpeg = ffmpeg or find_binary("ffmpeg")
+    audio_codec = ["-c:a", "pcm_s16le"] if ext == ".mov" else ["-c:a", "aac"]
+    cmd = [
+        ffmpeg, "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate=25:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-ac", str(channels), "-c:v", "mpeg4", "-q:v", "5", *audio_codec, "-shortest", path,
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def build_fixtures(folder=DEFAULT_DIR, matrix=DEFAULT_MATRIX, copies=4, ffmpeg=None):
+    # Each matrix entry is rendered once and then hardlinked/copied `copies` times under distinct names; other
+    # copies already in `folder` are removed. Returns the list of paths in `folder`.
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for duration, channels, ext in matrix:
+        master = os.path.join(folder, ".master_" + fixture_name(duration, channels, ext))
+        if not os.path.exists(master):
+            make_clip(master, duration, channels, ext, ffmpeg)
+        for i in range(copies):
+            base, _ = os.path.splitext(fixture_name(duration, channels, ext))
+            path = os.path.join(folder, f"{base}_{i:03d}{ext}")
+            if not os.path.exists(path):
+                try:
+                    os.link(master, path)
+                except OSError:
+                    shutil.copyfile(master, path)
+            paths.append(path)
+    # Copies left over from a run with more --copies (or another matrix) would otherwise be converted too
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name.startswith("synthetic_") and path not in paths:
+            os.remove(path)
+    return paths
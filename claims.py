@@ -0,0 +1,213 @@
+# claims.py
+# Lets several ProxyMate processes (on one machine or many, sharing storage) split one batch. Before converting a
+# file a worker creates a claim file for it in a shared folder; the claim is kept alive by a heartbeat (its mtime)
+# and a claim whose heartbeat stops for longer than the lease can be taken over by another worker.
+#
+# Only file-creation with O_EXCL and rename are relied on, so this works on NFS and SMB shares. Clocks on the
+# machines involved should agree to well within the lease.
+import contextlib
+import glob
+import hashlib
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+
+DEFAULT_LEASE = 60.0
+HEARTBEAT_FRACTION = 0.2  # heartbeat every lease * this, so a few can be missed before a claim goes stale
+LOCK_STALE = 30.0  # a manifest lock older than this was left behind by a crashed worker
+
+
+def worker_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _create(path, payload):
+    # Creates `path` only if nobody else has; returns False if it already exists
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    return True
+
+
+def _stat_key(st):
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+@contextlib.contextmanager
+def exclusive(path, timeout=30.0):
+    # Short-lived cross-process lock (a lock file); used around read-merge-write of shared JSON files
+    lock = path + ".lock"
+    deadline = time.monotonic() + timeout
+    while not _create(lock, {"worker": worker_name()}):
+        try:
+            if time.time() - os.path.getmtime(lock) > LOCK_STALE:
+                os.remove(lock)
+                continue
+        except OSError:
+            continue
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{lock} is still held")
+        time.sleep(0.05)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock)
+        except OSError:
+            pass
+
+
+class ClaimBoard:
+    # One claim file per input in `folder`. claim() before converting, release() once the result is recorded.
+    def __init__(self, folder, lease=DEFAULT_LEASE, on_lost=None, worker=None):
+        self.folder = folder
+        self.lease = lease
+        self.worker = worker or worker_name()
+        self.on_lost = on_lost  # called with the file when another worker took over one of our claims
+        self.reclaimed = 0
+        self._lock = threading.Lock()
+        self._held = {}  # file -> generation of our claim
+        self._stop = threading.Event()
+        os.makedirs(folder, exist_ok=True)
+        self._heartbeat = threading.Thread(target=self._beat, daemon=True)
+        self._heartbeat.start()
+
+    def _path(self, file):
+        return os.path.join(self.folder, hashlib.sha1(file.encode("utf-8")).hexdigest()[:24] + ".claim")
+
+    def _payload(self, file, generation):
+        return {"file": file, "worker": self.worker, "generation": generation, "claimed": time.time()}
+
+    def _expired(self, st):
+        return time.time() - st.st_mtime > self.lease
+
+    def _stale(self, path):
+        try:
+            return self._expired(os.stat(path))
+        except OSError:
+            return False
+
+    def claim(self, file):
+        # True if this worker now holds the file; False if another live worker does
+        path = self._path(file)
+        if _create(path, self._payload(file, 1)):
+            generation = 1
+        else:
+            # Stalled holder, or an empty/unreadable claim left by a crash between creating and writing it.
+            # The claim must be the same stale file before and after reading it: a takeover or heartbeat landing
+            # in between means what we read is live.
+            try:
+                before = os.stat(path)
+                if not self._expired(before):
+                    return False
+                current = _read(path)
+                if _stat_key(os.stat(path)) != _stat_key(before):
+                    return False
+            except OSError:
+                return False
+            generation = current.get("generation", 1) if current else 0
+            if not self._take(path, generation):
+                return False
+            temp = f"{path}.{self.worker}.tmp"
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(self._payload(file, generation + 1), f)
+            os.replace(temp, path)
+            generation += 1
+            with self._lock:
+                self.reclaimed += 1
+        with self._lock:
+            self._held[file] = generation
+        return True
+
+    def _take(self, path, generation):
+        # Whoever creates the takeover marker for this generation gets the file, so two workers noticing the same
+        # stale claim can't both take it. A marker as old as the lease was left by a worker that crashed mid-
+        # takeover; the next one in the chain (.takeover-N.1, .takeover-N.2, ...) is tried instead of removing it,
+        # so there's no window where two workers both see "no marker".
+        for attempt in itertools.count():
+            marker = f"{path}.takeover-{generation}" + (f".{attempt}" if attempt else "")
+            if _create(marker, {"worker": self.worker}):
+                return True
+            if not self._stale(marker):
+                return False
+
+    def owns(self, file):
+        # Checked right before outputs are committed: a worker that stalled past its lease must not overwrite them
+        with self._lock:
+            generation = self._held.get(file)
+        if generation is None:
+            return False
+        current = _read(self._path(file))
+        return bool(current) and current.get("worker") == self.worker and current.get("generation") == generation
+
+    def busy(self, file):
+        # Held by some live worker (this one included)
+        path = self._path(file)
+        return os.path.exists(path) and not self._stale(path)
+
+    def held_by(self, file, pid):
+        # Whether a live claim on `file` belongs to a worker with this pid (e.g. the writer of a partial output).
+        # A paused worker still heartbeats, so its claim stays live; a taken-over or released one doesn't count.
+        # Pids aren't unique across hosts, so a match may be a false positive; that only keeps a file longer.
+        path = self._path(file)
+        if not os.path.exists(path) or self._stale(path):
+            return False
+        current = _read(path)
+        if current is None:
+            return True  # being written right now
+        return str(current.get("worker", "")).rpartition("-")[2] == str(pid)
+
+    def release(self, file):
+        owned = self.owns(file)
+        with self._lock:
+            self._held.pop(file, None)
+        if owned:
+            path = self._path(file)
+            for marker in glob.glob(glob.escape(path) + ".takeover-*"):
+                try:
+                    os.remove(marker)
+                except OSError:
+                    pass
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _beat(self):
+        interval = max(self.lease * HEARTBEAT_FRACTION, 0.5)
+        while not self._stop.wait(interval):
+            with self._lock:
+                held = list(self._held)
+            for file in held:
+                if not self.owns(file):
+                    with self._lock:
+                        self._held.pop(file, None)
+                    if self.on_lost:
+                        self.on_lost(file)
+                    continue
+                try:
+                    os.utime(self._path(file))
+                except OSError:
+                    pass
+
+    def close(self):
+        self._stop.set()
+        self._heartbeat.join()
+        with self._lock:
+            held = list(self._held)
+        for file in held:
+            self.release(file)
@@ -0,0 +1,189 @@
+# cli.py
+# Headless entry point: same engine as the ProxyMate window, without loading PyQt5/AppKit
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+from claims import DEFAULT_LEASE
+from encoders import CANDIDATES, DEFAULT_QUALITY_FLOOR
+from governor import IO_CLASSES, PROFILES, ResourcePolicy, parse_cpus
+from scheduler import DEFAULT_MIN_FREE
+from staging import DEFAULT_PREFETCH, DEFAULT_SCRATCH_CAP
+from engine import (LINK_MODES, MEDIA_EXTENSIONS, PREFLIGHT_COLUMNS, PROBE_BACKENDS, ConversionEngine, default_job_count,
+                    preflight_rows, summarize_report)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="proxymate",
+        description="Batch fix the number of audio channels in video proxies.",
+    )
+    parser.add_argument("input", help="folder of proxy files")
+    parser.add_argument("output", help="folder for processed proxies")
+    parser.add_argument("-c", "--channels", type=int, nargs="+", required=True, choices=range(1, 9), metavar="{1..8}",
+                        help="number of audio channels to match the OCF; several values write one <N>ch "
+                             "subfolder per count from a single pass over each file")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help=f"parallel ffmpeg jobs (default: {default_job_count()})")
+    parser.add_argument("--copy-jobs", type=int, default=None,
+                        help="parallel copies of files that already match (default: same as --jobs)")
+    parser.add_argument("--adaptive-io", choices=("auto", "on", "off"), default="auto",
+                        help="start with few jobs and adjust to measured disk/network throughput; "
+                             "auto turns it on for NFS/SMB volumes (default: auto)")
+    parser.add_argument("--min-free", type=float, default=DEFAULT_MIN_FREE / 1024 ** 3, metavar="GB",
+                        help="don't start new jobs while the output volume has less free space than this "
+                             "(default: %(default).0f)")
+    parser.add_argument("--scratch", metavar="DIR",
+                        help="local scratch folder (ideally an SSD): transcodes read a prefetched copy of their input "
+                             "and write there, and outputs upload in the background; for proxies on a NAS")
+    parser.add_argument("--scratch-size", type=float, default=DEFAULT_SCRATCH_CAP / 1024 ** 3, metavar="GB",
+                        help="most scratch space to use; least recently used inputs are evicted (default: %(default).0f)")
+    parser.add_argument("--prefetch", type=int, default=DEFAULT_PREFETCH, metavar="N",
+                        help="inputs to fetch ahead of the running transcodes (default: %(default)s)")
+    parser.add_argument("--shared", metavar="DIR",
+                        help="split the batch with other workers (processes or machines) that use the same DIR on "
+                             "shared storage; each file is claimed before it's converted")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE, metavar="SECONDS",
+                        help="a claim not refreshed for this long is taken over by another worker (default: %(default).0f)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="convert byte-identical inputs once and give the others links/copies of that output "
+                             "(see --link); content hashes are kept for later runs")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="foreground",
+                        help="background: low CPU/IO priority, a thread cap per ffmpeg and fewer jobs while the system "
+                             "is busy, for machines someone is editing on (default: foreground)")
+    parser.add_argument("--nice", type=int, default=None, metavar="N", help="CPU priority for ffmpeg (overrides the profile)")
+    parser.add_argument("--io-class", choices=sorted(IO_CLASSES), default=None,
+                        help="Linux I/O scheduling class for ffmpeg (overrides the profile)")
+    parser.add_argument("--cpus", type=parse_cpus, default=None, metavar="LIST",
+                        help="pin ffmpeg to these cores, e.g. 0-3,6 (Linux)")
+    parser.add_argument("--threads", type=int, default=None, metavar="N",
+                        help="-threads for each ffmpeg (overrides the profile)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="include subfolders, mirroring them in the output")
+    parser.add_argument("--ext", default=",".join(MEDIA_EXTENSIONS), metavar="EXTS",
+                        help="comma-separated extensions to pick up (default: %(default)s)")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="only pick up files whose name matches GLOB (repeatable; overrides --ext)")
+    parser.add_argument("--link", choices=LINK_MODES, default="auto",
+                        help="how to output files that already match: auto (reflink, else fast copy), copy, "
+                             "hardlink or symlink (default: auto)")
+    parser.add_argument("--encoder", choices=sorted(CANDIDATES), default=None,
+                        help="audio encoder for re-encoded files (default: fastest available, measured once and cached)")
+    parser.add_argument("--quality-floor", type=int, choices=(2, 3, 4), default=DEFAULT_QUALITY_FLOOR,
+                        help="minimum encoder quality when picking automatically: 2 proxy, 3 transparent, 4 lossless")
+    parser.add_argument("--probe", choices=PROBE_BACKENDS, default="auto",
+                        help="auto reads MP4/MOV headers directly and uses ffprobe for anything else; "
+                             "ffprobe always starts ffprobe (default: auto)")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="probe and report what would happen, write nothing")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="keep running and convert new files as they arrive in the input folder")
+    parser.add_argument("--settle", type=float, default=5.0, metavar="SECONDS",
+                        help="in watch mode, how long a file must stop growing before it is queued (default: 5)")
+    parser.add_argument("--report", metavar="PATH", help="write a JSON report of the run to PATH")
+    parser.add_argument("-v", "--verbose", action="store_true", help="also print ffmpeg's own output")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors and the summary")
+    return parser.parse_args(argv)
+
+
+def print_table(columns, rows):
+    widths = [max([len(c)] + [len(row[i]) for row in rows]) for i, c in enumerate(columns)]
+    for row in [columns] + rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+
+def stop_on_signal(signums, stop):
+    # Signal handlers run on the main thread, which may be holding the engine lock right then, so the handler
+    # only sets an event and a helper thread calls stop()
+    received = threading.Event()
+
+    def wait():
+        received.wait()
+        stop()
+
+    threading.Thread(target=wait, daemon=True).start()
+    for signum in signums:
+        signal.signal(signum, lambda signum, frame: received.set())
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not os.path.isdir(args.input):
+        print(f"Input folder is missing or invalid: {args.input}", file=sys.stderr)
+        return 2
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        print("Input and output folders must be different.", file=sys.stderr)
+        return 2
+    if args.watch and args.dedupe:
+        print("--dedupe compares whole batches and can't be combined with --watch.", file=sys.stderr)
+        return 2
+    if not args.dry_run:
+        os.makedirs(args.output, exist_ok=True)
+
+    engine = ConversionEngine(args.input, args.output, args.channels, args.jobs,
+                              recursive=args.recursive, dry_run=args.dry_run,
+                              extensions=[e.strip() for e in args.ext.split(",") if e.strip()], patterns=args.include,
+                              link_mode=args.link, encoder=args.encoder, quality_floor=args.quality_floor,
+                              copy_jobs=args.copy_jobs, adaptive_io={"on": True, "off": False}.get(args.adaptive_io, "auto"),
+                              min_free_bytes=int(args.min_free * 1024 ** 3), probe_backend=args.probe,
+                              scratch_dir=args.scratch, scratch_cap_bytes=int(args.scratch_size * 1024 ** 3),
+                              prefetch=args.prefetch, shared_dir=args.shared, lease_seconds=args.lease,
+                              dedupe=args.dedupe,
+                              resources=ResourcePolicy(args.profile, args.nice, args.io_class, args.cpus, args.threads))
+
+    def on_log(message):
+        message = message.rstrip()
+        if message and (not args.quiet or message.startswith("❌")):
+            print(message, flush=True)
+
+    def on_progress(percent):
+        if sys.stderr.isatty() and not args.quiet:
+            print(f"\r{percent:3d}%", end="", file=sys.stderr, flush=True)
+
+    engine.log.connect(on_log)
+    if args.verbose:
+        engine.ffmpeg_log.connect(lambda file, line: print(f"[{file}] {line}", flush=True))
+
+    if args.watch:
+        from watch import FolderWatch
+
+        watcher = FolderWatch(engine, settle=args.settle)
+        stop_on_signal((signal.SIGINT, signal.SIGTERM), watcher.stop)
+        processed = watcher.run()
+        print(f"✅ {processed} file{'s' if processed != 1 else ''} processed while watching.")
+        return 0
+
+    engine.progress.connect(on_progress)
+    # Ctrl-C stops dispatching and terminates live ffmpeg children instead of orphaning them
+    stop_on_signal((signal.SIGINT,), engine.cancel)
+
+    processed = engine.run()
+    failed = [r for r in engine.results if r["status"] == "failed"]
+
+    if sys.stderr.isatty() and not args.quiet:
+        print(file=sys.stderr)
+    verb = "would be processed" if args.dry_run else "processed"
+    print(f"✅ {processed} file{'s' if processed != 1 else ''} {verb}, "
+          f"{engine.skipped_count} skipped, {len(failed)} failed.")
+
+    report = engine.report()
+    if args.dry_run and not args.quiet:
+        print_table(PREFLIGHT_COLUMNS, preflight_rows(report))
+    for line in summarize_report(report):
+        print(line)
+    if not args.dry_run:
+        json_path, _ = engine.write_report()
+        print(f"📝 Run report: {json_path}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if engine.cancelled:
+        return 130
+    return 1 if failed or engine.out_of_space else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
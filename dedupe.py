@@ -0,0 +1,97 @@
+# dedupe.py
+# Finds byte-identical inputs in a batch so each distinct file is converted only once. Files are compared by size
+# first, then by a hash of a few sampled blocks, and only files whose samples match are hashed in full to confirm.
+# Only files with the same extension are grouped: the output keeps the input's name, and what a conversion
+# produces depends on the container (e.g. PCM audio only goes into .mov).
+import hashlib
+import os
+import threading
+
+SAMPLE_BLOCK = 64 * 1024  # read at the start, middle and end of the file
+CHUNK = 1024 * 1024
+
+
+def sampled_hash(path, size):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(path, "rb") as f:
+        if size <= 3 * SAMPLE_BLOCK:
+            h.update(f.read())
+        else:
+            for offset in (0, (size - SAMPLE_BLOCK) // 2, size - SAMPLE_BLOCK):
+                f.seek(offset)
+                h.update(f.read(SAMPLE_BLOCK))
+    return h.hexdigest()
+
+
+def full_hash(path, size=None):
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+HASHES = {"sample": sampled_hash, "full": full_hash}
+
+
+class Deduper:
+    # Remembers one original per distinct content seen so far in `root`; original_of() says which earlier file
+    # a new one duplicates. Hashes are looked up in / stored to `index` (engine.HashIndex) so reruns skip them.
+    def __init__(self, root, index):
+        self.root = root
+        self.index = index
+        self._lock = threading.Lock()
+        self._by_size = {}  # (size, lowercase extension) -> [original file, one per distinct content]
+        self._size_locks = {}
+
+    def _hash(self, file, kind, st):
+        path = os.path.join(self.root, file)
+        value = self.index.get_hash(path, kind, st)
+        if value is None:
+            value = HASHES[kind](path, st.st_size)
+            self.index.put_hash(path, kind, value, st)
+        return value
+
+    def _same(self, file, st, other):
+        other_st = os.stat(os.path.join(self.root, other))
+        if os.path.samestat(st, other_st):
+            return True  # hardlinks of one file
+        if other_st.st_size != st.st_size or self._hash(file, "sample", st) != self._hash(other, "sample", other_st):
+            return False
+        return self._hash(file, "full", st) == self._hash(other, "full", other_st)
+
+    @staticmethod
+    def _group(file, size):
+        return size, os.path.splitext(file)[1].lower()
+
+    def add(self, file):
+        # An original that needs no comparison now (e.g. already converted in an earlier run)
+        size = os.path.getsize(os.path.join(self.root, file))
+        with self._lock:
+            self._by_size.setdefault(self._group(file, size), []).append(file)
+
+    def original_of(self, file):
+        # The earlier file with the same content, or None if this is the first of its kind (it becomes the original)
+        st = os.stat(os.path.join(self.root, file))
+        if not st.st_size:
+            return None
+        with self._lock:
+            size_lock = self._size_locks.setdefault(st.st_size, threading.Lock())
+        # Only files of the same size wait on each other while hashing
+        with size_lock:
+            group = self._group(file, st.st_size)
+            with self._lock:
+                originals = list(self._by_size.get(group, []))
+            for original in originals:
+                try:
+                    if self._same(file, st, original):
+                        return original
+                except OSError:
+                    continue
+            with self._lock:
+                self._by_size.setdefault(group, []).append(file)
+        return None
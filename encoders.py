@@ -0,0 +1,129 @@
+# encoders.py
+# Picks the audio encoder used when a file's audio has to be re-encoded.
+# What the ffmpeg build offers is detected and timed once; the result is cached per ffmpeg binary.
+import os
+import subprocess
+import threading
+import time
+
+from engine import PCM_ONLY_CONTAINERS, cache_dir, fingerprint, read_json, write_json_atomic
+
+# Candidate encoders, best quality first. Quality is a coarse score used for the floor:
+# 2 = fine for proxies, 3 = transparent at default bitrates, 4 = lossless. PCM is only picked automatically
+# when the floor asks for lossless, since it makes .mov proxies much bigger; MXF takes nothing else, so it always
+# gets PCM.
+CANDIDATES = {
+    "pcm_s16le": {"quality": 4, "containers": (".mov", ".mxf")},
+    "libfdk_aac": {"quality": 3, "containers": (".mp4", ".mov", ".m4v")},
+    "aac_at": {"quality": 3, "containers": (".mp4", ".mov", ".m4v")},
+    "aac": {"quality": 2, "containers": (".mp4", ".mov", ".m4v")},
+}
+DEFAULT_QUALITY_FLOOR = 2
+LOSSLESS = 4
+QUALITY_NAMES = {2: "proxy", 3: "transparent", 4: "lossless"}
+BENCH_SECONDS = 20  # of synthetic 5.1 audio per encoder
+# One detection at a time per process: a selector created while another is measuring waits and reads its cache
+_MEASURE_LOCK = threading.Lock()
+
+
+def available_encoders(ffmpeg):
+    result = subprocess.run([ffmpeg, "-hide_banner", "-encoders"], stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True)
+    names = set()
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        # " A....D aac   AAC (Advanced Audio Coding)"
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[0].startswith("A"):
+            names.add(parts[1])
+    return [name for name in CANDIDATES if name in names]
+
+
+def measure_encoder(ffmpeg, name, seconds=BENCH_SECONDS):
+    # Realtime multiple for encoding `seconds` of 5.1 audio, or None if the encoder can't do it
+    cmd = [
+        ffmpeg, "-v", "error", "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={seconds}",
+        "-ac", "6", "-c:a", name, "-f", "null", "-",
+    ]
+    started = time.perf_counter()
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        return None
+    return round(seconds / max(elapsed, 1e-6), 1)
+
+
+class EncoderSelector:
+    # Fastest encoder per container that meets the quality floor, unless `override` names one
+    VERSION = 1
+
+    def __init__(self, ffmpeg, override=None, quality_floor=DEFAULT_QUALITY_FLOOR, path=None, on_warning=None):
+        self.ffmpeg = ffmpeg
+        self.override = override
+        self.quality_floor = quality_floor
+        self.path = path or os.path.join(cache_dir(), "encoders.json")
+        self.on_warning = on_warning or (lambda message: None)
+        self.speeds = {}  # encoder -> realtime multiple
+        self._loaded = False
+        self._warned = set()  # containers already warned about
+
+    def _binary_key(self):
+        try:
+            return {"path": os.path.abspath(self.ffmpeg), **fingerprint(self.ffmpeg)}
+        except OSError:
+            return {"path": self.ffmpeg}
+
+    def load(self):
+        # Uses the cached measurements when the ffmpeg binary hasn't changed, otherwise measures and caches
+        with _MEASURE_LOCK:
+            if self._loaded:
+                return self.speeds
+            key = self._binary_key()
+            data = read_json(self.path)
+            if data and data.get("version") == self.VERSION and data.get("ffmpeg") == key:
+                self.speeds = data["speeds"]
+            else:
+                try:
+                    names = available_encoders(self.ffmpeg)
+                except OSError:
+                    names = []
+                self.speeds = {}
+                for name in names:
+                    speed = measure_encoder(self.ffmpeg, name)
+                    if speed is not None:
+                        self.speeds[name] = speed
+                if self.speeds:
+                    try:
+                        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                        write_json_atomic(self.path, {"version": self.VERSION, "ffmpeg": key, "speeds": self.speeds})
+                    except OSError:
+                        pass
+            self._loaded = True
+            return self.speeds
+
+    def pick(self, output_ext):
+        ext = output_ext.lower()
+        if self.override:
+            spec = CANDIDATES.get(self.override)
+            if spec is None or ext in spec["containers"]:
+                return self.override
+        if ext in PCM_ONLY_CONTAINERS:
+            return "pcm_s16le"
+        speeds = self.load()
+        usable = [
+            name for name, spec in CANDIDATES.items()
+            if name in speeds and ext in spec["containers"] and spec["quality"] >= self.quality_floor
+            and (spec["quality"] < LOSSLESS or self.quality_floor >= LOSSLESS)
+        ]
+        if not usable:
+            if self.quality_floor > CANDIDATES["aac"]["quality"] and ext not in self._warned:
+                self._warned.add(ext)
+                self.on_warning(f"⚠️ No available audio encoder for {ext} meets quality floor {self.quality_floor} "
+                                f"({QUALITY_NAMES.get(self.quality_floor, 'custom')}); using native aac instead\n")
+            return "aac"
+        return max(usable, key=lambda name: speeds[name])
+
+    def describe(self):
+        speeds = self.load()
+        if not speeds:
+            return "native aac (encoder detection unavailable)"
+        return ", ".join(f"{name} {speed}x" for name, speed in sorted(speeds.items(), key=lambda kv: -kv[1]))
@@ -0,0 +1,1973 @@
+# engine.py
+# Qt-free conversion engine shared by the ProxyMate window (main.py) and the command line (cli.py)
+import sys
+import os
+import ctypes
+import ctypes.util
+import fnmatch
+import csv
+import functools
+import hashlib
+import json
+import re
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from claims import DEFAULT_LEASE, HEARTBEAT_FRACTION, ClaimBoard, exclusive
+from dedupe import Deduper
+from governor import LoadMonitor, ResourcePolicy, own_cpu_seconds
+from mp4probe import UnsupportedMedia, probe_mp4
+from scheduler import (DEFAULT_MIN_FREE, AdaptiveLimit, DiskSpaceGuard, JobQueue, VolumeMeter, is_network_path,
+                       volume_of)
+from staging import DEFAULT_PREFETCH, DEFAULT_SCRATCH_CAP, Stager
+
+
+@functools.lru_cache(maxsize=None)
+def find_binary(name):
+    # Prefer the ffmpeg/ffprobe bundled next to the app, then whatever is on PATH. Looked up once per process.
+    bundled = os.path.join(getattr(sys, "_MEIPASS", os.getcwd()), name)
+    if os.path.exists(bundled):
+        return bundled
+    return shutil.which(name) or bundled
+
+
+class Signal:
+    # Minimal stand-in for pyqtSignal so the engine can report without Qt
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            slot(*args)
+
+
+def cache_dir():
+    if sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "ProxyMate")
+
+
+def write_json_atomic(path, payload):
+    # Write next to the target and rename over it so readers never see a half-written file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def read_json(path):
+    # None when the file is missing or unreadable; callers treat that as "no cached state"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+# === Probing ===
+PROBE_BACKENDS = ("auto", "ffprobe")  # auto: read MP4/MOV headers in-process, ffprobe for everything else
+PROBE_ENTRIES = (
+    "format=duration,size,format_name:"
+    "stream=index,codec_type,codec_name,channels,channel_layout,sample_rate,duration"
+)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_probe(data):
+    # Boil ffprobe's JSON down to what the pipeline actually uses, so cache entries stay small
+    fmt = data.get("format", {})
+    streams = []
+    for s in data.get("streams", []):
+        streams.append({
+            "index": s.get("index"),
+            "codec_type": s.get("codec_type"),
+            "codec_name": s.get("codec_name"),
+            "channels": s.get("channels"),
+            "channel_layout": s.get("channel_layout"),
+            "sample_rate": int(s["sample_rate"]) if s.get("sample_rate") else None,
+            "duration": _to_float(s.get("duration")),
+        })
+    return {
+        "format": fmt.get("format_name"),
+        "duration": _to_float(fmt.get("duration")),
+        "streams": streams,
+    }
+
+
+def audio_streams(info):
+    return [s for s in info["streams"] if s["codec_type"] == "audio"]
+
+
+def primary_channels(info):
+    audio = audio_streams(info)
+    if not audio or not audio[0]["channels"]:
+        raise ValueError("no audio stream found")
+    return audio[0]["channels"]
+
+
+class ProbeCache:
+    # Probe results on disk, keyed by absolute path and invalidated by size + mtime
+    VERSION = 1
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), "probe_cache.json")
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        data = read_json(self.path)
+        if data and data.get("version") == self.VERSION:
+            self._entries = data.get("entries", {})
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": self.VERSION, "entries": dict(self._entries)}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_json_atomic(self.path, payload)
+        except OSError:
+            pass  # the cache is only an optimisation
+
+    def get(self, path, st=None):
+        st = st or os.stat(path)
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry["info"]
+        return None
+
+    def put(self, path, info, st=None):
+        st = st or os.stat(path)
+        with self._lock:
+            self._entries[os.path.abspath(path)] = {
+                "size": st.st_size, "mtime_ns": st.st_mtime_ns, "info": info,
+            }
+            self._dirty = True
+
+
+class HashIndex(ProbeCache):
+    # Content hashes for --dedupe ("sample" and, when it was needed, "full"), invalidated the same way
+    def __init__(self, path=None):
+        super().__init__(path or os.path.join(cache_dir(), "hash_index.json"))
+
+    def get_hash(self, path, kind, st=None):
+        st = st or os.stat(path)
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry.get(kind)
+        return None
+
+    def put_hash(self, path, kind, value, st=None):
+        st = st or os.stat(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+                entry = self._entries[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            entry[kind] = value
+            self._dirty = True
+
+
+# === Job manifest ===
+MANIFEST_NAME = ".proxymate-manifest.json"
+JOURNAL_NAME = ".proxymate-manifest.journal"  # one JSON line per file recorded since the last compaction
+MARKER_DIR = ".proxymate-manifest.d"  # with --shared: one small JSON file per recorded input, until compaction
+
+
+def fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _stat_key(st):
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class JobManifest:
+    # Per-output-folder record of what each input was converted to, so a rerun only redoes missing/stale work
+    VERSION = 1
+
+    def __init__(self, output_folder, shared=False):
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self.journal_path = os.path.join(output_folder, JOURNAL_NAME)
+        self.marker_dir = os.path.join(output_folder, MARKER_DIR)
+        # Other processes write to it too (--shared): each records its files as markers, merged when compacting
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._loaded = None
+        self._journal = None  # append handle, opened by the first record()
+        self._markers = {}  # marker path -> stat key when it was read, so compact() only removes what it merged
+        self.files = {}
+        self.refresh()
+        self.files.update(self._read_journal())
+        self.files.update(self._read_markers())
+
+    def _read_journal(self):
+        entries = {}
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    entries[entry.pop("name")] = entry
+        except OSError:
+            pass
+        return entries
+
+    def _marker_path(self, name):
+        return os.path.join(self.marker_dir, hashlib.sha1(name.encode("utf-8")).hexdigest()[:24] + ".json")
+
+    def _read_marker(self, path):
+        # (name, entry) from one marker, remembering its stat key; None if it's gone or unreadable
+        try:
+            key = _stat_key(os.stat(path))
+        except OSError:
+            return None
+        data = read_json(path)
+        if not data or "name" not in data:
+            return None
+        with self._lock:
+            self._markers[path] = key
+        name = data.pop("name")
+        return name, data
+
+    def _read_markers(self):
+        entries = {}
+        try:
+            names = os.listdir(self.marker_dir)
+        except OSError:
+            return entries
+        for marker in names:
+            if marker.endswith(".json"):
+                found = self._read_marker(os.path.join(self.marker_dir, marker))
+                if found:
+                    entries[found[0]] = found[1]
+        return entries
+
+    def refresh(self):
+        # Picks up entries compacted in by other workers; cheap when the file hasn't changed since the last look.
+        # mtime alone can miss a rewrite on shares with coarse timestamps, so inode and size are compared too.
+        try:
+            stamp = _stat_key(os.stat(self.path))
+        except OSError:
+            return
+        if stamp == self._loaded:
+            return
+        data = read_json(self.path)
+        if data and data.get("version") == self.VERSION:
+            with self._lock:
+                self.files.update(data.get("files", {}))
+                self._loaded = stamp
+
+    def refresh_entry(self, name):
+        # Another worker's latest result for one file: its marker, or the manifest once that's been compacted
+        found = self._read_marker(self._marker_path(name))
+        if found is None:
+            self.refresh()
+            return
+        with self._lock:
+            self.files[name] = found[1]
+
+    @staticmethod
+    def exists(output_folder):
+        # Also looks one level down, where multi-target runs keep a manifest per <N>ch folder.
+        # An interrupted run may only have left a journal or markers behind.
+        def present(folder):
+            names = (MANIFEST_NAME, JOURNAL_NAME, MARKER_DIR)
+            return any(os.path.exists(os.path.join(folder, name)) for name in names)
+
+        if present(output_folder):
+            return True
+        try:
+            with os.scandir(output_folder) as it:
+                return any(e.is_dir() and present(e.path) for e in it)
+        except OSError:
+            return False
+
+    def is_complete(self, name, input_path, channels, output_path):
+        with self._lock:
+            entry = self.files.get(name)
+        if not entry or entry.get("status") != "done" or entry.get("channels") != channels:
+            return False
+        try:
+            if entry.get("input") != fingerprint(input_path):
+                return False
+            # A truncated or replaced output won't match what we recorded when it finished
+            return entry.get("output") == fingerprint(output_path)
+        except OSError:
+            return False
+
+    def record(self, name, input_path, channels, output_path, status):
+        # Raises OSError if the entry couldn't be written; it's still kept in memory for this run
+        entry = {"channels": channels, "status": status}
+        try:
+            entry["input"] = fingerprint(input_path)
+            if status == "done":
+                entry["output"] = fingerprint(output_path)
+        except OSError:
+            entry["status"] = "failed"
+        with self._lock:
+            self.files[name] = entry
+            if self.shared:
+                # One small file per input instead of a locked rewrite of everything; other workers read just
+                # the markers of the files they're waiting on
+                os.makedirs(self.marker_dir, exist_ok=True)
+                write_json_atomic(self._marker_path(name), {"name": name, **entry})
+            else:
+                # Appending keeps each record O(1); compact() folds the journal into the manifest
+                if self._journal is None:
+                    self._journal = open(self.journal_path, "a", encoding="utf-8")
+                self._journal.write(json.dumps({"name": name, **entry}) + "\n")
+                self._journal.flush()
+
+    def compact(self):
+        # Rewrites the manifest with everything recorded and drops the journal and merged markers; once at the
+        # end of a run (and now and then in watch mode). Raises TimeoutError if another worker holds the shared
+        # manifest's lock for too long; the markers then stay and are merged next time.
+        if self.shared:
+            with exclusive(self.path):
+                data = read_json(self.path)
+                markers = self._read_markers()
+                with self._lock:
+                    if data and data.get("version") == self.VERSION:
+                        self.files = {**data.get("files", {}), **self.files}
+                    self.files.update(markers)
+                    write_json_atomic(self.path, {"version": self.VERSION, "files": self.files})
+                    self._remove_markers()
+            return
+        with self._lock:
+            if self._journal is None and not os.path.exists(self.journal_path) and not self._markers:
+                return
+            write_json_atomic(self.path, {"version": self.VERSION, "files": self.files})
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            try:
+                os.remove(self.journal_path)
+            except FileNotFoundError:
+                pass
+            self._remove_markers()
+
+    def _remove_markers(self):
+        # Under the lock: only markers nobody rewrote since they were merged
+        for path, key in list(self._markers.items()):
+            try:
+                if _stat_key(os.stat(path)) == key:
+                    os.remove(path)
+            except OSError:
+                pass
+        self._markers.clear()
+
+
+# === Logging ===
+LOG_DIR = ".proxymate-logs"  # full ffmpeg output per file, inside the output folder
+LOG_LEVELS = ("ffmpeg", "info", "warning", "error")
+
+
+def log_level(message):
+    # Engine messages carry their severity in the leading emoji
+    if message.startswith(("❌", "🛑")):
+        return "error"
+    if message.startswith("⚠️"):
+        return "warning"
+    return "info"
+
+
+def last_error_line(path):
+    # Last non-empty line of a per-file ffmpeg log, which is almost always the actual error
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = [line.strip() for line in f if line.strip()]
+    except OSError:
+        return ""
+    return lines[-1] if lines else ""
+
+
+# === Run reports ===
+REPORT_DIR = ".proxymate-reports"
+REPORT_FIELDS = [
+    "file", "status", "strategy", "method", "channels", "probe_seconds", "transcode_seconds",
+    "bytes_in", "bytes_out", "exit_code", "duplicate_of", "error",
+]
+
+
+def summarize_report(report):
+    # A few human-readable lines for the end of a run
+    lines = []
+    if report["bytes_in"]:
+        lines.append(f"📊 {report['bytes_in'] / 1_000_000_000:.2f} GB in {report['elapsed_seconds']:.0f}s "
+                     f"({report['mb_per_sec']} MB/s)")
+    if report["strategies"]:
+        lines.append("🧭 " + ", ".join(f"{count} {name}" for name, count in report["strategies"].items()))
+    io = report.get("io") or {}
+    if io.get("adaptive") and io.get("volumes"):
+        lines.append("📶 " + ", ".join(f"{name} {v['read_mb_per_sec']} MB/s read, {v['write_mb_per_sec']} MB/s written"
+                                      for name, v in io["volumes"].items())
+                     + " (final limits: " + ", ".join(f"{n} {kind}" for kind, n in io["limits"].items()) + ")")
+    if report.get("deduplicated"):
+        lines.append(f"🪞 {report['deduplicated']} duplicate{'s' if report['deduplicated'] != 1 else ''} "
+                     f"reused the output of an identical file")
+    shared = report.get("shared")
+    if shared:
+        lines.append(f"🤝 Worker {shared['worker']}: {shared['remote']} file{'s' if shared['remote'] != 1 else ''} "
+                     f"done by other workers, {shared['reclaimed']} stalled claim{'s' if shared['reclaimed'] != 1 else ''} taken over")
+    slow = [s for s in report["slowest"] if s["transcode_seconds"]][:3]
+    if slow:
+        lines.append("🐢 Slowest: " + ", ".join(f"{s['file']} ({s['transcode_seconds']:.1f}s)" for s in slow))
+    estimate = report.get("estimate")
+    if estimate:
+        lines.append(f"🔮 {estimate['matching']} already match, {estimate['changing']} need a channel change, "
+                     f"{estimate['already_done']} already done"
+                     + (f", {estimate['duplicates']} duplicates" if estimate.get("duplicates") else ""))
+        basis = "from past runs" if estimate["from_history"] else "rough guess until a real run has been measured"
+        lines.append(f"🔮 About {estimate['output_bytes'] / 1_000_000_000:.2f} GB to write, "
+                     f"~{format_duration(estimate['seconds'])} with {report['jobs']} job{'s' if report['jobs'] != 1 else ''} ({basis})")
+    failures = [r for r in report["results"] if r["status"] == "failed"]
+    if failures:
+        lines.append(f"❌ {len(failures)} failed:")
+        lines.extend(f"   {r['file']}: {r.get('error', '')}" for r in failures[:10])
+        if len(failures) > 10:
+            lines.append(f"   … and {len(failures) - 10} more (see the run report)")
+    return lines
+
+
+PREFLIGHT_COLUMNS = ("File", "Channels", "Plan", "Est. size", "Est. time")
+
+
+def preflight_rows(report):
+    # One row of display strings per file in a dry-run report, in PREFLIGHT_COLUMNS order
+    rows = []
+    for r in report["results"]:
+        if r["status"] == "skipped":
+            plan = "done earlier"
+        elif r["status"] == "would-deduplicate":
+            plan = f"same as {r['duplicate_of']}"
+        elif r["status"] == "failed":
+            plan = "can't read: " + r.get("error", "").split(": ", 1)[-1]
+        else:
+            plan = ", ".join(f"{t}ch {s}" for t, s in sorted(r.get("targets", {}).items(), key=lambda kv: int(kv[0])))
+        size = r.get("estimated_bytes")
+        seconds = r.get("estimated_seconds")
+        rows.append((
+            r["file"],
+            str(r.get("channels") or ""),
+            plan,
+            f"{size / 1_000_000:.1f} MB" if size is not None else "",
+            format_duration(seconds) if seconds is not None else "",
+        ))
+    return rows
+
+
+# === Throughput history (for dry-run time estimates) ===
+HISTORY_NAME = "throughput.json"
+HISTORY_DECAY = 0.7  # weight kept by older runs each time a new one is folded in
+# Used until this machine has finished a real run: realtime multiples per job, and bytes/s for copies
+DEFAULT_RATES = {"encode": 40.0, "remux": 150.0, "copy": 150_000_000}
+
+
+def job_kind(strategies):
+    # encode > remux > copy: how heavy the ffmpeg work for a file is, whatever mix of targets it has
+    if any(s in ("merge", "pad", "reencode") for s in strategies):
+        return "encode"
+    return "remux" if "stream-copy" in strategies else "copy"
+
+
+class ThroughputHistory:
+    # Per-job speed measured on this machine, kept in the cache folder across runs
+    VERSION = 1
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), HISTORY_NAME)
+        data = read_json(self.path)
+        self.totals = data["totals"] if data and data.get("version") == self.VERSION else {}
+
+    @property
+    def measured(self):
+        return bool(self.totals)
+
+    def rate(self, kind):
+        amount, seconds = self.totals.get(kind, (0, 0))
+        return amount / seconds if amount and seconds else DEFAULT_RATES[kind]
+
+    def estimate_seconds(self, kind, duration, bytes_in):
+        return (bytes_in if kind == "copy" else duration or 0) / self.rate(kind)
+
+    def record(self, results):
+        run = {}
+        for r in results:
+            if r["status"] not in ("copied", "converted") or not r.get("transcode_seconds"):
+                continue
+            kind = job_kind((r.get("strategy") or "").split(","))
+            if kind == "copy":
+                if r.get("method") not in ("copy", "copy_file_range"):
+                    continue  # links and clones don't say anything about disk speed
+                amount = r.get("bytes_in", 0)
+            else:
+                amount = r.get("duration") or 0
+            totals = run.setdefault(kind, [0.0, 0.0])
+            totals[0] += amount
+            totals[1] += r["transcode_seconds"]
+        if not run:
+            return
+        for kind, (amount, seconds) in run.items():
+            old_amount, old_seconds = self.totals.get(kind, (0, 0))
+            self.totals[kind] = [old_amount * HISTORY_DECAY + amount, old_seconds * HISTORY_DECAY + seconds]
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_json_atomic(self.path, {"version": self.VERSION, "totals": self.totals})
+        except OSError:
+            pass
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+# === ffmpeg -progress parsing ===
+class FFmpegProgress:
+    # Accumulates the key=value blocks ffmpeg writes with `-progress pipe:1`; each block ends with progress=...
+    KEYS = {
+        "frame", "fps", "stream_0_0_q", "bitrate", "total_size", "out_time_us", "out_time_ms", "out_time",
+        "dup_frames", "drop_frames", "speed", "progress",
+    }
+
+    def __init__(self, duration=None):
+        self.duration = duration
+        self.out_time = 0.0
+        self.total_size = 0
+        self.speed = None
+        self.done = False
+
+    @property
+    def fraction(self):
+        if self.done:
+            return 1.0
+        if not self.duration:
+            return 0.0
+        return min(self.out_time / self.duration, 1.0)
+
+    def feed(self, line):
+        # None: not a progress line, False: consumed, True: a block just ended
+        key, sep, value = line.strip().partition("=")
+        if not sep or key not in self.KEYS and not key.startswith("stream_"):
+            return None
+        value = value.strip()
+        if key in ("out_time_us", "out_time_ms"):
+            # out_time_ms is in microseconds too (long-standing ffmpeg quirk)
+            if value.lstrip("-").isdigit():
+                self.out_time = max(int(value) / 1_000_000, 0.0)
+        elif key == "total_size":
+            if value.isdigit():
+                self.total_size = int(value)
+        elif key == "speed":
+            self.speed = _to_float(value.rstrip("x"))
+        elif key == "progress":
+            self.done = value == "end"
+            return True
+        return False
+
+
+# === Conversion planning ===
+# Named layouts so pan/amerge output is something every encoder and NLE understands
+CHANNEL_LAYOUTS = {1: "mono", 2: "stereo", 3: "2.1", 4: "quad", 5: "5.0", 6: "5.1", 7: "6.1", 8: "7.1"}
+PCM_CONTAINERS = (".mov", ".mxf")
+PCM_ONLY_CONTAINERS = (".mxf",)  # ffmpeg's MXF muxer takes no AAC
+
+
+def _audio_codec(streams, output_ext, encoder="aac"):
+    # Filtered audio has to be encoded; PCM in, PCM out (lossless) where the container allows it
+    codecs = [s["codec_name"] or "" for s in streams]
+    ext = output_ext.lower()
+    if ext in PCM_CONTAINERS and codecs and all(c.startswith("pcm_") for c in codecs):
+        return max(codecs, key=lambda c: int("".join(ch for ch in c if ch.isdigit()) or 0))
+    if ext in PCM_ONLY_CONTAINERS:
+        return "pcm_s16le"
+    return encoder
+
+
+def _pan(channels, target):
+    mapping = "|".join(f"c{i}=c{i}" for i in range(channels))
+    return f"pan={CHANNEL_LAYOUTS.get(target, f'{target}c')}|{mapping}"
+
+
+def plan_conversion(info, target, output_ext, encoder="aac"):
+    # Pick the cheapest way to end up with `target` channels. Returns {"strategy", "args", "note"} where args go
+    # between the input and the output path on the ffmpeg command line (None for a plain file copy).
+    # `encoder` is used whenever audio has to be encoded and lossless PCM isn't an option.
+    audio = audio_streams(info)
+    if not audio or not audio[0]["channels"]:
+        raise ValueError("no audio stream found")
+    channels = [s["channels"] or 0 for s in audio]
+    video = ["-map", "0:v:0?", "-c:v", "copy"]
+
+    if channels[0] == target:
+        return {"strategy": "copy", "args": None, "note": f"already {target} channels"}
+
+    # Another audio stream already has the right channel count: keep it bit-for-bit, drop the rest
+    for i, count in enumerate(channels):
+        if count == target:
+            return {
+                "strategy": "stream-copy",
+                "args": video + ["-map", f"0:a:{i}", "-c:a", "copy"],
+                "note": f"audio stream {i} already {target} channels",
+            }
+
+    # Split tracks (e.g. one mono track per mic) that add up to the target: merge without mixing
+    total = 0
+    for k, count in enumerate(channels):
+        total += count
+        if total == target and k > 0:
+            inputs = "".join(f"[0:a:{i}]" for i in range(k + 1))
+            codec = _audio_codec(audio[:k + 1], output_ext, encoder)
+            return {
+                "strategy": "merge",
+                "args": video + ["-filter_complex", f"{inputs}amerge=inputs={k + 1},{_pan(target, target)}[aout]",
+                                 "-map", "[aout]", "-c:a", codec],
+                "note": f"merging {k + 1} audio streams ({codec})",
+            }
+        if total > target:
+            break
+
+    # Multichannel source short of the target: keep existing channels as they are and add silent ones
+    if 2 <= channels[0] < target:
+        codec = _audio_codec(audio[:1], output_ext, encoder)
+        return {
+            "strategy": "pad",
+            "args": video + ["-map", "0:a:0", "-af", _pan(channels[0], target), "-c:a", codec],
+            "note": f"padding {channels[0]} → {target} channels with silence ({codec})",
+        }
+
+    codec = _audio_codec(audio[:1], output_ext, encoder)
+    return {
+        "strategy": "reencode",
+        "args": video + ["-map", "0:a:0", "-ac", str(target), "-c:a", codec],
+        "note": f"remixing {channels[0]} → {target} channels ({codec})",
+    }
+
+
+def _audio_bytes_per_second(codec, channels, sample_rate):
+    # PCM is exact; anything compressed is guessed at 64 kb/s per channel, about what AAC proxies carry
+    codec = codec or ""
+    if codec.startswith("pcm_"):
+        bits = re.search(r"(\d+)", codec)
+        return (sample_rate or 48000) * (channels or 0) * (int(bits.group(1)) if bits else 16) / 8
+    return (channels or 0) * 8000
+
+
+def estimate_output_bytes(info, plan, target, bytes_in):
+    # Rough size of one output: the input minus its audio, plus whatever audio the plan writes
+    if plan["strategy"] == "copy":
+        return bytes_in
+    duration = info["duration"] or 0
+    audio = audio_streams(info)
+    old_audio = sum(_audio_bytes_per_second(s["codec_name"], s["channels"], s["sample_rate"]) for s in audio)
+    if plan["strategy"] == "stream-copy":
+        index = int(plan["args"][plan["args"].index("-c:a") - 1].split(":")[-1])
+        kept = audio[index]
+        new_audio = _audio_bytes_per_second(kept["codec_name"], kept["channels"], kept["sample_rate"])
+    else:
+        codec = plan["args"][plan["args"].index("-c:a") + 1]
+        new_audio = _audio_bytes_per_second(codec, target, audio[0]["sample_rate"])
+    return max(int(bytes_in - (old_audio - new_audio) * duration), 0)
+
+
+# === Copying files that already match ===
+LINK_MODES = ("auto", "copy", "hardlink", "symlink")
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+COPY_CHUNK = 64 * 1024 * 1024
+
+
+def _reflink(src, dst):
+    # Copy-on-write clone: instant and takes no extra space until one side is modified
+    if sys.platform == "darwin":
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            raise OSError(ctypes.get_errno(), "clonefile failed")
+        return
+    import fcntl
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+
+
+def _kernel_copy(src, dst, on_bytes=None):
+    # Let the kernel move the bytes (server-side copy on NFS 4.2/SMB3), falling back to big userspace reads
+    on_bytes = on_bytes or (lambda count: None)
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        copy_range = getattr(os, "copy_file_range", None)
+        if copy_range is not None:
+            try:
+                offset = 0
+                while offset < size:
+                    sent = copy_range(fsrc.fileno(), fdst.fileno(), min(COPY_CHUNK, size - offset))
+                    if sent == 0:
+                        break
+                    offset += sent
+                    on_bytes(sent)
+                if offset >= size:
+                    return "copy_file_range"
+            except OSError:
+                pass
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+        while True:
+            chunk = fsrc.read(COPY_CHUNK)
+            if not chunk:
+                break
+            fdst.write(chunk)
+            on_bytes(len(chunk))
+    return "copy"
+
+
+def place_file(src, dst, mode="auto", on_bytes=None):
+    # Put `src` at `dst` as cheaply as `mode` allows and return what was actually done.
+    # auto: reflink when the filesystem supports it, otherwise a kernel-side copy.
+    # on_bytes(count) is called as a real copy makes progress; links and clones move no data.
+    if os.path.lexists(dst):
+        # Never write through an old hardlink/symlink into someone else's file
+        os.remove(dst)
+    if mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass  # different filesystem or no link support; copy instead
+    elif mode == "symlink":
+        os.symlink(os.path.abspath(src), dst)
+        return "symlink"
+    elif mode == "auto":
+        try:
+            _reflink(src, dst)
+            shutil.copystat(src, dst)
+            return "reflink"
+        except (OSError, AttributeError):
+            pass
+    method = _kernel_copy(src, dst, on_bytes)
+    shutil.copystat(src, dst)
+    return method
+
+
+# === Atomic output ===
+PARTIAL_RE = re.compile(r"^\.(.+)\.partial-(\d+)(\.[^.]+)?$")  # base name, pid of the writer, extension
+
+
+def partial_path(path):
+    # Hidden sibling of `path` that keeps the real extension (ffmpeg picks the muxer from it)
+    folder, name = os.path.split(path)
+    base, ext = os.path.splitext(name)
+    return os.path.join(folder, f".{base}.partial-{os.getpid()}{ext}")
+
+
+def remove_partials(folder, older_than=None, in_use=None):
+    # Deletes temp outputs left behind by a cancelled or crashed run; returns how many were removed.
+    # With older_than (seconds), partials written to more recently are left alone, and so are those for which
+    # in_use(output path relative to `folder`, writer pid) says another worker still holds the file.
+    removed = 0
+    for root, dirs, names in os.walk(folder):
+        dirs[:] = [d for d in dirs if d not in (LOG_DIR, REPORT_DIR)]
+        for name in names:
+            match = PARTIAL_RE.match(name)
+            if match:
+                try:
+                    path = os.path.join(root, name)
+                    if older_than is not None and time.time() - os.path.getmtime(path) < older_than:
+                        continue
+                    output = os.path.normpath(os.path.join(os.path.relpath(root, folder),
+                                                           match.group(1) + (match.group(3) or "")))
+                    if in_use and in_use(output, int(match.group(2))):
+                        continue
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+    return removed
+
+
+# === Discovery ===
+MEDIA_EXTENSIONS = ('.mp4', '.mov')
+
+
+def make_matcher(extensions=MEDIA_EXTENSIONS, patterns=None):
+    # Glob patterns (matched case-insensitively against the file name) replace the extension filter when given
+    if patterns:
+        patterns = [p.lower() for p in patterns]
+        return lambda name: any(fnmatch.fnmatchcase(name.lower(), p) for p in patterns)
+    extensions = tuple(e.lower() if e.startswith(".") else f".{e.lower()}" for e in extensions)
+    return lambda name: name.lower().endswith(extensions)
+
+
+def iter_media_files(folder, recursive=False, matches=None, exclude=None):
+    # Yields paths relative to `folder` as the tree is walked, so callers can start work before the walk ends.
+    # Hidden entries are skipped, as is `exclude` (an output folder that lives inside the input folder).
+    matches = matches or make_matcher()
+    exclude = os.path.abspath(exclude) if exclude else None
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(folder, rel_dir)) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue  # unreadable or vanished directory; keep walking the rest
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            try:
+                if entry.is_dir():
+                    if recursive and os.path.abspath(entry.path) != exclude:
+                        subdirs.append(rel)
+                elif entry.is_file() and matches(entry.name):
+                    yield rel
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+
+def discover_files(folder, recursive=False, matches=None, exclude=None):
+    return list(iter_media_files(folder, recursive, matches, exclude))
+
+
+def default_job_count():
+    # ffmpeg with -c:v copy is mostly I/O + a cheap AAC encode, so one job per core is a sane default
+    return max(1, os.cpu_count() or 1)
+
+
+class ConversionEngine:
+    def __init__(self, input_folder, output_folder, audio_channels, max_jobs=None, recursive=False, dry_run=False,
+                 extensions=MEDIA_EXTENSIONS, patterns=None, link_mode="auto", probe_cache=None,
+                 encoder=None, quality_floor=None, copy_jobs=None, adaptive_io="auto",
+                 min_free_bytes=DEFAULT_MIN_FREE, probe_backend="auto", scratch_dir=None,
+                 scratch_cap_bytes=DEFAULT_SCRATCH_CAP, prefetch=DEFAULT_PREFETCH, shared_dir=None,
+                 lease_seconds=DEFAULT_LEASE, dedupe=False, hash_index=None, resources=None, history=None,
+                 encoder_cache=None):
+        self.progress = Signal()
+        self.file_progress = Signal()
+        self.stats = Signal()  # {"percent", "speed", "mb_per_sec", "eta"}
+        self.log = Signal()
+        self.ffmpeg_log = Signal()  # (file, line) for every line ffmpeg prints; also kept on disk per file
+        self.processed_count = 0
+        self.input_folder = input_folder
+        self.output_folder = output_folder
+        # One or several target channel counts. Several targets each get their own <output>/<N>ch folder
+        # (with its own manifest) and are all written by a single ffmpeg pass per input.
+        if isinstance(audio_channels, int):
+            audio_channels = [audio_channels]
+        self.targets = sorted(set(audio_channels))
+        self.target_dirs = {
+            t: output_folder if len(self.targets) == 1 else os.path.join(output_folder, f"{t}ch")
+            for t in self.targets
+        }
+        self.max_jobs = max_jobs or default_job_count()
+        self.probe_jobs = max(4, self.max_jobs * 2)
+        self.copy_jobs = copy_jobs or self.max_jobs
+        self.probe_cache = probe_cache or ProbeCache()
+        self.probe_backend = probe_backend
+        self.probe_counts = {"cached": 0, "native": 0, "ffprobe": 0}
+        # With a shared folder, several workers split the batch: each file is claimed before it's converted
+        self.claims = None
+        if shared_dir and not dry_run:
+            self.claims = ClaimBoard(shared_dir, lease_seconds, on_lost=self._on_claim_lost)
+        self._elsewhere = {}  # file -> (info, targets) held by another worker when we got to it
+        self.remote_count = 0  # finished by other workers
+        self.manifests = {t: JobManifest(self.target_dirs[t], shared=bool(self.claims)) for t in self.targets}
+        # Identical inputs are converted once; the others get links/copies of that output. Not with --shared,
+        # where the original and its duplicates could be claimed by different workers.
+        self.dedupe = Deduper(input_folder, hash_index or HashIndex()) if dedupe and not self.claims else None
+        self._dedupe_dropped = bool(dedupe and self.claims)  # warned about at the start of run()
+        self._duplicates = {}  # original -> [(file, targets)] waiting for it to finish
+        self._originals = {}  # original -> True/False once it has finished (or failed)
+        self.skipped_count = 0
+        self.recursive = recursive
+        self.link_mode = link_mode
+        self.matches = make_matcher(extensions, patterns)
+        self.dry_run = dry_run
+        self.results = []
+        self.keep_finished = True  # results and per-file stats of finished files; off in watch mode
+        self.history = history or ThroughputHistory()
+        self._metrics = {}  # file -> per-file numbers collected along the way, folded into results
+        self._finished = None
+        self.ffmpeg_path = find_binary("ffmpeg")
+        self.ffprobe_path = find_binary("ffprobe")
+        from encoders import DEFAULT_QUALITY_FLOOR, EncoderSelector  # encoders.py imports this module
+        self.encoders = EncoderSelector(self.ffmpeg_path, encoder,
+                                        DEFAULT_QUALITY_FLOOR if quality_floor is None else quality_floor,
+                                        path=encoder_cache, on_warning=self.log.emit)
+        self._is_cancelled = False
+
+        # Transcodes and plain copies get separate limits. On network storage (or with adaptive_io=True) each
+        # limit starts low and follows measured throughput; new jobs of either kind wait while the output is full.
+        if adaptive_io == "auto":
+            adaptive_io = is_network_path(input_folder) or is_network_path(output_folder)
+        self.adaptive_io = bool(adaptive_io)
+        self.out_of_space = False
+        self.disk = DiskSpaceGuard(output_folder, min_free_bytes, on_change=self._on_disk_space)
+        # Priority/affinity/threads for every child, and (background profile) fewer jobs while the system is busy
+        self.resources = resources or ResourcePolicy()
+        self.load = LoadMonitor(on_change=self._on_load, own_cpu=self._own_cpu) if self.resources.yield_to_load else None
+        self.gates = {
+            kind: AdaptiveLimit(kind, limit, self.adaptive_io, paused=functools.partial(self._dispatch_paused, kind),
+                                on_change=self._on_limit, ceiling=self.load.ceiling if self.load else None)
+            for kind, limit in (("transcode", self.max_jobs), ("copy", self.copy_jobs))
+        }
+        # Probed jobs wait here rather than in the pools' own queues, so they can be paused and reordered
+        self.queues = {"transcode": JobQueue(), "copy": JobQueue()}
+        self._paused = False
+        self._front = set()  # asked to go first before their probe finished
+        self._running = set()
+        self.volumes = VolumeMeter()
+        self._input_volume, self._output_volume = (volume_of(input_folder), volume_of(output_folder))
+        # With a scratch folder, transcodes read a local copy of their input (fetched a few jobs ahead) and write
+        # locally; finished outputs go back to the output folder in the background
+        self.stager = None
+        if scratch_dir and not dry_run:
+            self.stager = Stager(
+                scratch_dir, scratch_cap_bytes, prefetch,
+                copy=lambda src, dst, on_bytes: place_file(src, dst, "copy", on_bytes),
+                on_read=lambda count: self._count_io("transcode", read=count),
+                on_write=lambda count: self._count_io("transcode", written=count),
+                on_full=self._on_scratch_full,
+            )
+        self._staged = {}  # file -> {target: verified local output} between encode and upload
+        self._lock = threading.Lock()
+        self._processes = set()  # every live ffmpeg/ffprobe child, so cancel() can reach them all
+        self._file_progress = {}
+        self._file_weight = {}  # probed duration, so long files count for more of the bar
+        self._file_bytes = {}
+        self._file_speed = {}
+        # Running totals behind the overall bar, updated per file so a progress block doesn't walk every file
+        self._known_weight = self._known_done = self._unknown_done = self._bytes_total = 0.0
+        self._known_count = self._unknown_count = 0
+        self._last_percent = -1
+        self._last_stats = 0.0
+        self._started = time.monotonic()
+
+    @property
+    def cancelled(self):
+        return self._is_cancelled
+
+    def cancel(self):
+        # SIGTERM lets ffmpeg stop cleanly; anything still alive a few seconds later gets killed
+        self._is_cancelled = True
+        if self._paused:
+            self._paused = False
+            self._signal_children(getattr(signal, "SIGCONT", None))  # stopped processes can't act on SIGTERM
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.terminate()
+            except OSError:
+                pass
+        if processes:
+            killer = threading.Timer(5.0, self._kill_stragglers, args=(processes,))
+            killer.daemon = True
+            killer.start()
+
+    @staticmethod
+    def _kill_stragglers(processes):
+        for process in processes:
+            if process.poll() is None:
+                try:
+                    process.kill()
+                except OSError:
+                    pass
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def pause(self):
+        # Stop starting new jobs and freeze running ffmpeg/ffprobe children (SIGSTOP) where the OS allows it
+        if self._paused or self._is_cancelled:
+            return
+        self._paused = True
+        self._signal_children(getattr(signal, "SIGSTOP", None))
+        self.log.emit("⏸️ Paused\n")
+
+    def resume(self):
+        if not self._paused:
+            return
+        self._paused = False
+        self._signal_children(getattr(signal, "SIGCONT", None))
+        for gate in self.gates.values():
+            gate.wake()
+        self.log.emit("▶️ Resumed\n")
+
+    def _signal_children(self, signum):
+        if signum is None:
+            return  # Windows: running jobs carry on, only dispatching stops
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.send_signal(signum)
+            except OSError:
+                pass
+
+    def _dispatch_paused(self, kind):
+        if self._paused or self.disk.low():
+            return True
+        # Staged outputs pile up on scratch when uploads are slower than encoding
+        return kind == "transcode" and self.stager is not None and self.stager.full()
+
+    def prioritize(self, files):
+        # Move files to the front of the queue; ones still being probed go first once they get there
+        files = list(files)
+        moved = set()
+        for queue in self.queues.values():
+            moved.update(queue.prioritize(files))
+        with self._lock:
+            self._front.update(f for f in files if f not in moved and f not in self._running)
+        self._prefetch_ahead()
+        self.log.emit(f"⏫ Moved {len(files)} file{'s' if len(files) != 1 else ''} to the front of the queue\n")
+
+    def queue_snapshot(self):
+        with self._lock:
+            running = sorted(self._running)
+        return {
+            "paused": self._paused,
+            "running": running,
+            "pending": self.queues["transcode"].files() + self.queues["copy"].files(),
+        }
+
+    def _popen(self, cmd, **kwargs):
+        self.resources.apply_to_thread()
+        process = subprocess.Popen(cmd, **kwargs, **self.resources.popen_kwargs())
+        self.resources.after_spawn(process.pid)
+        with self._lock:
+            self._processes.add(process)
+        # cancel() or pause() may have fired between the check in the caller and the spawn above
+        if self._is_cancelled:
+            process.terminate()
+        elif self._paused and hasattr(signal, "SIGSTOP"):
+            process.send_signal(signal.SIGSTOP)
+        return process
+
+    def _release(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    def _on_disk_space(self, low, free):
+        gb = (free or 0) / 1024 ** 3
+        if low:
+            self.log.emit(f"⚠️ Only {gb:.1f} GB free in {self.output_folder}; new jobs are paused until space frees up\n")
+        else:
+            self.log.emit(f"▶️ {gb:.1f} GB free again; resuming\n")
+
+    def _on_scratch_full(self, full, waiting):
+        if full:
+            self.log.emit(f"⚠️ Scratch space is full with {waiting / 1024 ** 3:.1f} GB waiting to upload; "
+                          f"new transcodes are paused until uploads catch up\n")
+        else:
+            self.log.emit("▶️ Uploads caught up; resuming transcodes\n")
+
+    def _on_limit(self, kind, old, new, mb_per_sec):
+        self.log.emit(f"📶 {kind.capitalize()} jobs {old} → {new} ({mb_per_sec:.1f} MB/s)\n")
+
+    def _own_cpu(self):
+        # For the load monitor: what the batch itself adds to system load shouldn't make it back off
+        with self._lock:
+            pids = [process.pid for process in self._processes]
+        return own_cpu_seconds(pids)
+
+    def _on_load(self, old, new, pressure, source):
+        jobs = max(1, int(self.max_jobs * new))
+        if new < old:
+            self.log.emit(f"🧘 System busy ({source} {pressure:.2f}); running at most {jobs} "
+                          f"transcode{'s' if jobs != 1 else ''}\n")
+        else:
+            self.log.emit(f"🧘 System calmer ({source} {pressure:.2f}); up to {jobs} transcode{'s' if jobs != 1 else ''}\n")
+        for gate in self.gates.values():
+            gate.wake()
+
+    def _count_io(self, kind, read=0, written=0):
+        self.gates[kind].add_bytes(read + written)
+        self.volumes.add(self._input_volume, read=read)
+        self.volumes.add(self._output_volume, written=written)
+
+    def _weigh(self, file, sign):
+        # Under the lock: add (sign=1) or take back (sign=-1) one file's share of the running totals
+        fraction = self._file_progress[file]
+        weight = self._file_weight.get(file)
+        if weight:
+            self._known_weight += sign * weight
+            self._known_done += sign * weight * fraction
+            self._known_count += sign
+        else:
+            self._unknown_done += sign * fraction
+            self._unknown_count += sign
+
+    def _track(self, file, fraction=None, weight=None, bytes_out=None):
+        # Under the lock: every change to a file's progress, weight or output size goes through here
+        tracked = file in self._file_progress
+        if tracked:
+            self._weigh(file, -1)
+        if fraction is not None:
+            self._file_progress[file] = fraction
+        if weight is not None:
+            self._file_weight[file] = weight
+        if bytes_out is not None:
+            self._bytes_total += bytes_out - self._file_bytes.get(file, 0)
+            self._file_bytes[file] = bytes_out
+        if file in self._file_progress:
+            self._weigh(file, 1)
+
+    def _set_file_progress(self, file, fraction, bytes_out=None, speed=None):
+        now = time.monotonic()
+        with self._lock:
+            self._track(file, min(max(fraction, 0.0), 1.0), bytes_out=bytes_out)
+            if speed is not None and fraction < 1.0:
+                self._file_speed[file] = speed
+            else:
+                self._file_speed.pop(file, None)
+
+            # Files not probed yet count as an average one
+            fallback = self._known_weight / self._known_count if self._known_count else 1.0
+            total_weight = self._known_weight + fallback * self._unknown_count
+            done_weight = self._known_done + fallback * self._unknown_done
+            done = min(max(done_weight / total_weight, 0.0), 1.0) if total_weight > 0 else 0.0
+            percent = int(done * 100)
+
+            percent_changed = percent != self._last_percent
+            self._last_percent = percent
+            send_stats = percent_changed or now - self._last_stats >= 0.5
+            if send_stats:
+                self._last_stats = now
+                elapsed = now - self._started
+                stats = {
+                    "percent": done * 100,
+                    "speed": sum(self._file_speed.values()) or None,
+                    "mb_per_sec": self._bytes_total / elapsed / 1_000_000 if elapsed > 0 else None,
+                    "eta": elapsed / done * (1 - done) if done > 0.01 else None,
+                }
+        self.file_progress.emit(file, fraction)
+        if percent_changed:
+            self.progress.emit(percent)
+        if send_stats:
+            self.stats.emit(stats)
+
+    def _count_probe(self, backend):
+        with self._lock:
+            self.probe_counts[backend] += 1
+
+    def _probe(self, input_path, cache=True):
+        st = os.stat(input_path)
+        info = self.probe_cache.get(input_path, st) if cache else None
+        if info is not None:
+            self._count_probe("cached")
+            return info
+
+        if self.probe_backend == "auto":
+            try:
+                info = probe_mp4(input_path)
+            except (UnsupportedMedia, OSError):
+                info = None  # odd codec, fragmented or half-written file: let ffprobe have a go
+        if info is not None:
+            self._count_probe("native")
+        else:
+            info = self._ffprobe(input_path)
+            self._count_probe("ffprobe")
+        if cache:
+            self.probe_cache.put(input_path, info, st)
+        return info
+
+    def _ffprobe(self, input_path):
+        probe_cmd = [
+            self.ffprobe_path, "-v", "error", "-show_entries", PROBE_ENTRIES, "-of", "json", input_path
+        ]
+        process = self._popen(probe_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            self._release(process)
+        if process.returncode != 0:
+            raise RuntimeError(stderr.strip() or f"ffprobe exited with {process.returncode}")
+        return parse_probe(json.loads(stdout))
+
+    def _verify_output(self, path, target, source_info):
+        # Probe a finished temp output; returns None if it looks complete, otherwise what's wrong
+        try:
+            info = self._probe(path, cache=False)
+        except Exception as e:
+            return f"unreadable output ({e})"
+        audio = audio_streams(info)
+        if len(audio) != 1 or audio[0]["channels"] != target:
+            found = "+".join(str(s["channels"]) for s in audio) or "no"
+            return f"expected one {target}ch audio stream, found {found}"
+        expected, actual = source_info["duration"], info["duration"]
+        if expected and (actual is None or abs(actual - expected) > max(0.5, expected * 0.01)):
+            return f"duration {actual}s does not match source {expected}s"
+        return None
+
+    def _analyze(self, file):
+        if self._is_cancelled:
+            return None
+        started = time.monotonic()
+        try:
+            info, error = self._probe(os.path.join(self.input_folder, file)), None
+        except Exception as e:
+            info, error = None, e
+        self._metric(file, probe_seconds=round(time.monotonic() - started, 4))
+        if error is not None and not self._is_cancelled:
+            self._fail(file, f"Failed to analyze {file}: {error}")
+        return info
+
+    def log_path(self, file):
+        return os.path.join(self.output_folder, LOG_DIR, file + ".log")
+
+    def _open_file_log(self, file):
+        path = self.log_path(file)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return open(path, "w", encoding="utf-8", errors="replace")
+        except OSError:
+            return open(os.devnull, "w")
+
+    def _metric(self, file, **values):
+        with self._lock:
+            self._metrics.setdefault(file, {}).update(values)
+
+    def _record_result(self, file, status, **values):
+        with self._lock:
+            self.results.append({"file": file, "status": status, **self._metrics.pop(file, {}), **values})
+
+    def _fail(self, file, message):
+        self.log.emit(f"❌ {message}")
+        self._record_result(file, "failed", error=message)
+
+    @staticmethod
+    def _discard(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def output_path(self, file, target):
+        return os.path.join(self.target_dirs[target], file)
+
+    def _process_file(self, file, info, targets):
+        # Returns the result status for the file, or None if it failed (already reported through _fail)
+        if self._is_cancelled:
+            return "cancelled"
+
+        input_path = os.path.join(self.input_folder, file)
+        ext = os.path.splitext(file)[1]
+        try:
+            plans = {t: plan_conversion(info, t, ext, self.encoders.pick(ext)) for t in targets}
+        except ValueError as e:
+            self._fail(file, f"Failed to analyze {file}: {e}")
+            return None
+        strategies = sorted({p["strategy"] for p in plans.values()})
+        bytes_in = os.path.getsize(input_path)
+        self._metric(file, strategy=",".join(strategies), channels=primary_channels(info), duration=info["duration"],
+                     bytes_in=bytes_in, targets={str(t): p["strategy"] for t, p in plans.items()})
+
+        encodes = {t: p for t, p in plans.items() if p["strategy"] != "copy"}
+        if self.dry_run:
+            self._metric(
+                file,
+                estimated_bytes=sum(estimate_output_bytes(info, p, t, bytes_in) for t, p in plans.items()),
+                estimated_seconds=round(self.history.estimate_seconds(job_kind(strategies), info["duration"], bytes_in), 2),
+            )
+            for t, plan in plans.items():
+                if plan["strategy"] == "copy":
+                    self.log.emit(f"📁 Would copy {file} ({plan['note']})\n")
+                else:
+                    self.log.emit(f"🎬 Would process {file} → {t}ch [{plan['strategy']}: {plan['note']}]\n")
+            return "would-convert" if encodes else "would-copy"
+
+        return self._write_outputs(file, info, plans, "transcode" if encodes else "copy")
+
+    def _write_outputs(self, file, info, plans, kind):
+        input_path = os.path.join(self.input_folder, file)
+        encodes = {t: p for t, p in plans.items() if p["strategy"] != "copy"}
+        bytes_out = 0
+        for t, plan in plans.items():
+            if plan["strategy"] != "copy":
+                continue
+            output_path = self.output_path(file, t)
+            temp_path = partial_path(output_path)
+            try:
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                method = place_file(input_path, temp_path, self.link_mode,
+                                    on_bytes=lambda count: self._count_io(kind, read=count, written=count))
+                if os.path.getsize(temp_path) != os.path.getsize(input_path):
+                    raise OSError("copy is incomplete")
+                if not self._owns(file):
+                    self._discard(temp_path)
+                    return "cancelled"
+                os.replace(temp_path, output_path)
+            except Exception as e:
+                self._discard(temp_path)
+                self._fail(file, f"Failed to copy {file}: {e}")
+                return None
+            self.log.emit(f"📁 Copied {file} via {method} ({plan['note']})\n")
+            bytes_out += os.path.getsize(output_path)
+            self._metric(file, method=method, bytes_out=bytes_out)
+            if not encodes:
+                copied = method not in ("reflink", "hardlink", "symlink")
+                self._set_file_progress(file, 1.0, bytes_out=bytes_out if copied else 0)
+        if not encodes:
+            return "copied"
+
+        # Staged jobs read the scratch copy (None if it didn't fit) and write their outputs to scratch
+        staged_input = self.stager.acquire(input_path) if self.stager else None
+        try:
+            return self._encode(file, info, encodes, staged_input or input_path, kind, bytes_out)
+        finally:
+            if staged_input:
+                self.stager.release(staged_input)
+
+    def _encode(self, file, info, encodes, source, kind, bytes_out):
+        input_path = os.path.join(self.input_folder, file)
+        local_in = source != input_path
+        # One input, one output per target: ffmpeg demuxes and decodes the source once and feeds every output
+        # Each output goes to a hidden temp name (or to scratch) first and only replaces the real file once it
+        # checks out, so an interrupted run never leaves a truncated file that looks finished
+        threads = self.resources.ffmpeg_args(self.max_jobs)
+        cmd = [self.ffmpeg_path, "-y", "-nostats", "-progress", "pipe:1", *threads, "-i", source]
+        temp_paths = {}
+        for t, plan in encodes.items():
+            output_path = self.output_path(file, t)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            if self.stager:
+                temp_paths[t] = self.stager.output_path(os.path.splitext(output_path)[1])
+            else:
+                temp_paths[t] = partial_path(output_path)
+            cmd += plan["args"] + threads + [temp_paths[t]]
+            self.log.emit(f"🎬 Processing {file} → {t}ch [{plan['strategy']}: {plan['note']}]\n")
+
+        tracker = FFmpegProgress(info["duration"])
+        bytes_in = os.path.getsize(input_path)
+        counted_in = counted_out = 0
+        file_log = self._open_file_log(file)
+        file_log.write(" ".join(cmd) + "\n\n")
+        process = self._popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        try:
+            for line in process.stdout:
+                consumed = tracker.feed(line)
+                if consumed is None:
+                    file_log.write(line)
+                    self.ffmpeg_log.emit(file, line.rstrip())
+                elif consumed:
+                    self._set_file_progress(file, tracker.fraction, tracker.total_size, tracker.speed)
+                    # Scratch-disk traffic isn't network traffic; the stager counts its own transfers
+                    read = 0 if local_in else int(bytes_in * tracker.fraction)
+                    written = 0 if self.stager else tracker.total_size or 0
+                    self._count_io(kind, read=max(read - counted_in, 0), written=max(written - counted_out, 0))
+                    counted_in, counted_out = max(read, counted_in), max(written, counted_out)
+            process.wait()
+        finally:
+            self._release(process)
+            file_log.close()
+            if process.returncode != 0 or self._is_cancelled:
+                for temp_path in temp_paths.values():
+                    self._discard(temp_path)
+        self._metric(file, exit_code=process.returncode)
+        if self._is_cancelled:
+            self.log.emit(f"⚠️ FFmpeg process terminated ({file}).\n")
+            return "cancelled"
+        if process.returncode != 0:
+            self._fail(file, f"FFmpeg failed on {file} (exit code {process.returncode}): {last_error_line(self.log_path(file))}")
+            return None
+
+        problems = {t: self._verify_output(temp_paths[t], t, info) for t in encodes}
+        if any(problems.values()):
+            for temp_path in temp_paths.values():
+                self._discard(temp_path)
+            detail = "; ".join(f"{t}ch: {p}" for t, p in problems.items() if p)
+            self._fail(file, f"Output check failed for {file}: {detail}")
+            return None
+        if not self._owns(file):
+            for temp_path in temp_paths.values():
+                self._discard(temp_path)
+            return "cancelled"
+        if self.stager:
+            bytes_out += sum(os.path.getsize(p) for p in temp_paths.values())
+            self._metric(file, bytes_out=bytes_out)
+            with self._lock:
+                self._staged[file] = temp_paths
+            return "staged"
+        for t in encodes:
+            os.replace(temp_paths[t], self.output_path(file, t))
+        bytes_out += sum(os.path.getsize(self.output_path(file, t)) for t in encodes)
+        self._metric(file, bytes_out=bytes_out)
+        return "converted"
+
+    def _run_job(self, file, info, targets=None):
+        targets = targets or self.targets
+        started = time.monotonic()
+        try:
+            status = self._process_file(file, info, targets)
+        except Exception as e:
+            self._metric(file, transcode_seconds=round(time.monotonic() - started, 4))
+            self._fail(file, f"Failed to process {file}: {e}")
+            status = None
+        finally:
+            self._set_file_progress(file, 1.0)
+        if status == "cancelled":
+            with self._lock:
+                self._metrics.pop(file, None)
+            if self.claims:
+                self.claims.release(file)
+            return  # leave the manifest entries as-is so the next run redoes this file
+        if status == "staged":
+            self._metric(file, transcode_seconds=round(time.monotonic() - started, 4))
+            with self._lock:
+                outputs = self._staged.pop(file)
+            self._upload_outputs(file, targets, outputs)
+            return
+        if status is not None:
+            self._record_result(file, status, transcode_seconds=round(time.monotonic() - started, 4))
+        self._finish(file, targets, status)
+
+    def _upload_outputs(self, file, targets, outputs):
+        # Each verified local output goes to a partial next to its final name and is renamed into place there;
+        # the file counts as done once the last one has landed
+        remaining = [len(outputs)]
+        errors = []
+
+        def uploaded(error):
+            self.gates["transcode"].wake()  # scratch space freed up
+            with self._lock:
+                if error:
+                    errors.append(error)
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            if errors:
+                self._fail(file, f"Failed to upload {file}: {errors[0]}")
+                self._finish(file, targets, None)
+            else:
+                self._record_result(file, "converted")
+                self._finish(file, targets, "converted")
+
+        for t, local in outputs.items():
+            output_path = self.output_path(file, t)
+            self.stager.upload(local, output_path, partial_path(output_path), uploaded)
+
+    def _finish(self, file, targets, status):
+        if not self.dry_run:
+            for t in targets:
+                try:
+                    self.manifests[t].record(
+                        file, os.path.join(self.input_folder, file), t, self.output_path(file, t),
+                        "done" if status else "failed"
+                    )
+                except OSError as e:
+                    self.log.emit(f"⚠️ Couldn't record {file} in the {t}ch manifest ({e}); "
+                                  f"a later run will convert it again\n")
+        if status:
+            with self._lock:
+                self.processed_count += 1
+        if self.claims:
+            self.claims.release(file)
+        self._settle_duplicates(file, bool(status))
+        if not self.keep_finished:
+            self._forget(file)
+
+    # === Duplicate inputs (--dedupe) ===
+    def _analyze_unique(self, file, targets):
+        # Probe result for the first file with a given content. Duplicates of an earlier file return None and
+        # are filled in from its outputs once it's done.
+        self.resources.apply_to_thread()
+        if self.dedupe and not self._is_cancelled:
+            try:
+                original = self.dedupe.original_of(file)
+            except OSError:
+                original = None  # unreadable; the probe will say so
+            if original is not None:
+                self._add_duplicate(file, original, targets)
+                return None
+        return self._analyze(file)
+
+    def _add_duplicate(self, file, original, targets):
+        if self.dry_run:
+            self.log.emit(f"🪞 Would reuse the output of {original} for {file} (identical content)\n")
+            self._record_result(file, "would-deduplicate", duplicate_of=original, estimated_bytes=0,
+                                estimated_seconds=0)
+            self._finish(file, targets, "would-deduplicate")
+            return
+        with self._lock:
+            done = self._originals.get(original)
+            if done is None:
+                self._duplicates.setdefault(original, []).append((file, targets))
+                return
+        self._fill_duplicate(file, original, targets, done)
+
+    def _settle_duplicates(self, file, done):
+        if not self.dedupe:
+            return
+        with self._lock:
+            self._originals[file] = done
+            waiting = self._duplicates.pop(file, [])
+        for duplicate, targets in waiting:
+            self._fill_duplicate(duplicate, file, targets, done)
+
+    def _fill_duplicate(self, file, original, targets, done):
+        if not done:
+            self._fail(file, f"Skipped {file}: it's identical to {original}, which failed")
+            self._finish(file, targets, None)
+            return
+        bytes_out = 0
+        for t in targets:
+            output_path = self.output_path(file, t)
+            temp_path = partial_path(output_path)
+            try:
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                method = place_file(self.output_path(original, t), temp_path, self.link_mode,
+                                    on_bytes=lambda count: self._count_io("copy", read=count, written=count))
+                os.replace(temp_path, output_path)
+            except Exception as e:
+                self._discard(temp_path)
+                self._fail(file, f"Failed to reuse the output of {original} for {file}: {e}")
+                self._finish(file, targets, None)
+                return
+            bytes_out += os.path.getsize(output_path)
+        self.log.emit(f"🪞 {file} is identical to {original}; reused its output via {method}\n")
+        self._set_file_progress(file, 1.0)
+        self._record_result(file, "deduplicated", duplicate_of=original, method=method, bytes_out=bytes_out)
+        self._finish(file, targets, "deduplicated")
+
+    # === Shared batches (several workers, one claim folder) ===
+    def _on_claim_lost(self, file):
+        self.log.emit(f"⚠️ Another worker took over {file} after this one stalled; the copy made here will be dropped\n")
+
+    def _owns(self, file):
+        # Right before outputs are committed: a worker that stalled past its lease must not overwrite them
+        if self.claims is None or self.claims.owns(file):
+            return True
+        self.log.emit(f"⚠️ Dropping the copy of {file} made here; another worker has taken it over\n")
+        return False
+
+    def _claim(self, file, info, targets):
+        # Targets left to do now that this worker holds the file; None if another worker has it or finished it
+        if not self.claims:
+            return targets
+        if not self.claims.claim(file):
+            with self._lock:
+                self._elsewhere[file] = (info, targets)
+            return None
+        # It may have been finished between our walk and the claim
+        for t in targets:
+            self.manifests[t].refresh_entry(file)
+        pending = [t for t in self._pending_targets(file) if t in targets]
+        if not pending:
+            self.claims.release(file)
+            with self._lock:
+                self.remote_count += 1
+            self._set_file_progress(file, 1.0)
+        return pending or None
+
+    def _finished_elsewhere(self, file, targets):
+        pending = [t for t in self._pending_targets(file) if t in targets]
+        entries = [self.manifests[t].files.get(file) or {} for t in pending]
+        return all(e.get("status") == "failed" for e in entries)  # someone tried it; don't fail it again
+
+    def _wait_for_others(self, pools):
+        # Files other workers held when we got to them: wait until they're recorded, and take over any whose
+        # worker stopped heartbeating (crashed, lost the share, was suspended...)
+        announced = False
+        while not self._is_cancelled:
+            with self._lock:
+                waiting = dict(self._elsewhere)
+                self._elsewhere.clear()
+            if not waiting:
+                return
+            retry = []
+            for file, (info, targets) in waiting.items():
+                if self.claims.busy(file):
+                    with self._lock:
+                        self._elsewhere[file] = (info, targets)
+                    continue
+                for t in targets:
+                    self.manifests[t].refresh_entry(file)
+                if self._finished_elsewhere(file, targets):
+                    with self._lock:
+                        self.remote_count += 1
+                    self._set_file_progress(file, 1.0)
+                else:
+                    retry.append((file, info, targets))
+            if retry:
+                futures = []
+                for file, info, targets in retry:
+                    kind = self._job_kind(file, info, targets)
+                    self.queues[kind].push(file, (info, targets))
+                    futures.append(pools[kind].submit(self._run_next, kind))
+                for future in as_completed(futures):
+                    future.result()
+                continue
+            with self._lock:
+                remaining = len(self._elsewhere)
+            if not remaining:
+                return
+            if not announced:
+                self.log.emit(f"⏳ Waiting for {remaining} file{'s' if remaining != 1 else ''} other workers are converting\n")
+                announced = True
+            time.sleep(min(self.claims.lease * HEARTBEAT_FRACTION, 2.0))
+
+    def _pending_targets(self, file):
+        input_path = os.path.join(self.input_folder, file)
+        return [
+            t for t in self.targets
+            if not self.manifests[t].is_complete(file, input_path, t, self.output_path(file, t))
+        ]
+
+    def convert_one(self, file):
+        # Probe and convert a single file (relative to input_folder) on the caller's thread; used by watch mode
+        if self._is_cancelled:
+            return
+        targets = self._pending_targets(file)
+        if not targets:
+            return
+        with self._lock:
+            self._track(file, 0.0)
+        info = self._analyze(file)
+        if info is None:
+            self._forget(file)
+            return
+        with self._lock:
+            self._track(file, weight=info["duration"])
+        kind = self._job_kind(file, info, targets)
+        if not self.dry_run and not self.gates[kind].acquire(lambda: self._is_cancelled):
+            self._forget(file)
+            return
+        try:
+            targets = self._claim(file, info, targets)
+            if targets:
+                self._run_tracked(file, info, targets)
+            else:
+                self._forget(file)  # done elsewhere, or held by another worker (see deferred_files())
+        finally:
+            if not self.dry_run:
+                self.gates[kind].release()
+
+    def deferred_files(self):
+        # Watch mode with --shared: files another worker held when convert_one() got to them. The caller offers
+        # them again later; by then they're either recorded (and skipped) or free to claim.
+        with self._lock:
+            files = list(self._elsewhere)
+            self._elsewhere.clear()
+        return files
+
+    def _forget(self, file):
+        # Drops the per-file progress, metrics and results once a file is done (watch mode only)
+        with self._lock:
+            if file in self._file_progress:
+                self._weigh(file, -1)
+                del self._file_progress[file]
+            for kept in (self._file_weight, self._file_bytes, self._file_speed, self._metrics):
+                kept.pop(file, None)
+            self.results = [r for r in self.results if r["file"] != file]
+
+    def _run_tracked(self, file, info, targets):
+        self.resources.apply_to_thread()
+        with self._lock:
+            self._running.add(file)
+        try:
+            self._run_job(file, info, targets)
+        finally:
+            with self._lock:
+                self._running.discard(file)
+
+    def _run_next(self, kind):
+        # Pool task, one per queued job. The slot is taken before the job is picked, so files moved to the front
+        # while every slot was busy (or while paused) still start first.
+        gate = None if self.dry_run else self.gates[kind]
+        if gate and not gate.acquire(lambda: self._is_cancelled):
+            return
+        try:
+            item = self.queues[kind].pop()
+            if item is None or self._is_cancelled:
+                return
+            if kind == "transcode":
+                self._prefetch_ahead()
+            file, (info, targets) = item
+            targets = self._claim(file, info, targets)
+            if targets:
+                self._run_tracked(file, info, targets)
+        finally:
+            if gate:
+                gate.release()
+
+    def iter_files(self):
+        return iter_media_files(self.input_folder, self.recursive, self.matches, exclude=self.output_folder)
+
+    def _job_kind(self, file, info, targets):
+        ext = os.path.splitext(file)[1]
+        try:
+            plans = [plan_conversion(info, t, ext, self.encoders.pick(ext)) for t in targets]
+        except ValueError:
+            return "transcode"  # _process_file reports it
+        return "transcode" if any(p["strategy"] != "copy" for p in plans) else "copy"
+
+    def _queue_transcode(self, pools, futures, file, targets, probe):
+        # Runs on the probe thread as soon as a probe finishes, so transcodes start while discovery continues
+        info = None if probe.cancelled() else probe.result()
+        if info is None or self._is_cancelled:
+            self._set_file_progress(file, 1.0)
+            if not self._is_cancelled:
+                self._settle_duplicates(file, False)  # couldn't be probed, so nothing identical can be converted
+            return
+        kind = self._job_kind(file, info, targets)
+        with self._lock:
+            self._track(file, weight=info["duration"])
+            front = file in self._front
+            self._front.discard(file)
+            self.queues[kind].push(file, (info, targets), front=front)
+            futures.append(pools[kind].submit(self._run_next, kind))
+        if kind == "transcode":
+            self._prefetch_ahead()
+
+    def _prefetch_ahead(self):
+        # Keep local copies of the next few queued transcodes on their way while the current ones run
+        if self.stager:
+            for file in self.queues["transcode"].files()[:self.stager.prefetch_depth]:
+                self.stager.prefetch(os.path.join(self.input_folder, file))
+
+    def close(self):
+        # Waits for background uploads (or drops them after a cancel), clears the scratch folder and gives up
+        # any claims still held
+        if self.stager:
+            self.stager.close(cancel=self._is_cancelled)
+        if self.claims:
+            self.claims.close()
+        self.save_manifests()
+
+    def save_manifests(self):
+        if self.dry_run:
+            return
+        for manifest in self.manifests.values():
+            try:
+                manifest.compact()
+            except TimeoutError:
+                self.log.emit(f"⚠️ Another worker is holding {manifest.path}; this worker's results stay in "
+                              f"{MARKER_DIR} and are merged next time\n")
+            except OSError as e:
+                self.log.emit(f"⚠️ Couldn't save {manifest.path}: {e}\n")
+
+    def remove_partials(self):
+        if self.dry_run:
+            return
+        older_than = self.claims.lease if self.claims else None
+        in_use = self.claims.held_by if self.claims else None
+        folders = [d for d in set(self.target_dirs.values()) if os.path.isdir(d)]
+        removed = sum(remove_partials(d, older_than, in_use) for d in folders)
+        if removed:
+            self.log.emit(f"🧹 Removed {removed} partial output{'s' if removed != 1 else ''} from an interrupted run\n")
+
+    def run(self):
+        # Returns the number of files written (or, for a dry run, that would have been)
+        self._started = time.monotonic()
+        self.remove_partials()
+        if not self.dry_run:
+            free = self.disk.free()
+            if free is not None and free < self.disk.min_free:
+                self.log.emit(f"🛑 Only {free / 1024 ** 3:.1f} GB free in {self.output_folder} "
+                              f"(at least {self.disk.min_free / 1024 ** 3:.1f} GB needed); nothing was started\n")
+                self.out_of_space = True
+                self._finished = time.monotonic()
+                self.close()
+                return 0
+            self.log.emit(f"🔊 Audio encoders: {self.encoders.describe()}\n")
+        self.log.emit(f"⚙️ Running up to {self.max_jobs} transcode{'s' if self.max_jobs != 1 else ''} and "
+                      f"{self.copy_jobs} cop{'ies' if self.copy_jobs != 1 else 'y'} in parallel"
+                      f"{', adapting to storage throughput' if self.adaptive_io else ''}\n")
+        if self.stager and self.stager.abandoned_bytes:
+            self.log.emit(f"🧹 Removed {self.stager.abandoned_bytes / 1024 ** 3:.1f} GB of staged files left by an "
+                          f"interrupted run\n")
+        if self.stager:
+            self.log.emit(f"💾 Staging transcodes in {self.stager.folder} (up to {self.stager.cap / 1024 ** 3:.0f} GB, "
+                          f"fetching {self.stager.prefetch_depth} ahead)\n")
+        if self.resources.profile != "foreground" or self.resources.nice or self.resources.cpus:
+            r = self.resources
+            parts = [f"nice {r.nice}", f"{r.io_class or 'default'} I/O"]
+            threads = r.thread_count(self.max_jobs)
+            if threads:
+                parts.append(f"{threads} thread{'s' if threads != 1 else ''} per ffmpeg")
+            if r.cpus:
+                parts.append("CPUs " + ",".join(map(str, sorted(r.cpus))))
+            if r.yield_to_load:
+                parts.append("fewer jobs while the system is busy")
+            self.log.emit(f"🧘 {r.profile.capitalize()} profile: {', '.join(parts)}\n")
+        if self.claims:
+            self.log.emit(f"🤝 Sharing the batch through {self.claims.folder} as {self.claims.worker}\n")
+        if self._dedupe_dropped:
+            self.log.emit("⚠️ --dedupe is off for shared batches: a file and its duplicates could be claimed by "
+                          "different workers\n")
+
+        # Files are probed as the walk finds them, and each probe hands off to the transcode pool when it's done.
+        # Progress is relative to what has been found so far.
+        probe_pool = ThreadPoolExecutor(max_workers=self.probe_jobs)
+        pools = {
+            "transcode": ThreadPoolExecutor(max_workers=self.max_jobs),
+            "copy": ThreadPoolExecutor(max_workers=self.copy_jobs),
+        }
+        futures = []
+        try:
+            for file in self.iter_files():
+                if self._is_cancelled:
+                    break
+                targets = self._pending_targets(file)
+                if not targets:
+                    self.skipped_count += 1
+                    self.results.append({"file": file, "status": "skipped"})
+                    if self.dedupe:
+                        self.dedupe.add(file)  # later duplicates can reuse its finished outputs
+                        self._settle_duplicates(file, True)
+                    continue
+                with self._lock:
+                    self._track(file, 0.0)
+                probe = probe_pool.submit(self._analyze_unique, file, targets)
+                probe.add_done_callback(functools.partial(self._queue_transcode, pools, futures, file, targets))
+
+            if self.skipped_count:
+                self.log.emit(f"⏭️ Skipping {self.skipped_count} file{'s' if self.skipped_count != 1 else ''} "
+                              f"already completed in a previous run\n")
+
+            probe_pool.shutdown(wait=True)
+            with self._lock:
+                submitted = list(futures)
+            for future in as_completed(submitted):
+                future.result()
+                if self._is_cancelled:
+                    break
+            if self.claims and not self._is_cancelled:
+                self._wait_for_others(pools)
+            if self.stager and not self._is_cancelled:
+                self.stager.wait_uploads()
+            if self._is_cancelled:
+                self.log.emit("⚠️ Processing cancelled by user.\n")
+        finally:
+            # Don't start anything still queued; running jobs see the cancel flag and their children get terminated
+            probe_pool.shutdown(wait=True, cancel_futures=True)
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+            self.close()
+            self.probe_cache.save()
+            if self.dedupe:
+                self.dedupe.index.save()
+            self._finished = time.monotonic()
+            if not self.dry_run:
+                with self._lock:
+                    results = list(self.results)
+                self.history.record(results)
+        return self.processed_count
+
+    def report(self):
+        # Summary + per-file metrics for the run so far, ready for json.dump
+        elapsed = (self._finished or time.monotonic()) - self._started
+        with self._lock:
+            results = sorted(self.results, key=lambda r: r["file"])
+        done = [r for r in results if r["status"] in ("copied", "converted")]
+        bytes_in = sum(r.get("bytes_in", 0) for r in done)
+        bytes_out = sum(r.get("bytes_out", 0) for r in done)
+        slowest = sorted(done, key=lambda r: r.get("transcode_seconds", 0), reverse=True)[:5]
+        return {
+            "input": os.path.abspath(self.input_folder),
+            "output": os.path.abspath(self.output_folder),
+            "channels": self.targets,
+            "dry_run": self.dry_run,
+            "cancelled": self._is_cancelled,
+            "jobs": self.max_jobs,
+            "elapsed_seconds": round(elapsed, 3),
+            "processed": self.processed_count,
+            "skipped": self.skipped_count,
+            "failed": sum(1 for r in results if r["status"] == "failed"),
+            "deduplicated": sum(1 for r in results if r["status"] == "deduplicated"),
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "mb_per_sec": round(bytes_in / elapsed / 1_000_000, 2) if elapsed > 0 else None,
+            "probe_seconds": round(sum(r.get("probe_seconds", 0) for r in results), 3),
+            "probes": dict(self.probe_counts),
+            "transcode_seconds": round(sum(r.get("transcode_seconds", 0) for r in results), 3),
+            "io": {
+                "adaptive": self.adaptive_io,
+                "limits": {kind: gate.allowed() for kind, gate in self.gates.items()},
+                "volumes": self.volumes.summary(self._volume_labels()),
+                "staging": {"hits": self.stager.hits, "misses": self.stager.misses} if self.stager else None,
+            },
+            "strategies": {s: sum(1 for r in done if r.get("strategy") == s)
+                           for s in sorted({r.get("strategy") for r in done if r.get("strategy")})},
+            "slowest": [{"file": r["file"], "transcode_seconds": r.get("transcode_seconds")} for r in slowest],
+            "estimate": self._estimate(results) if self.dry_run else None,
+            "resources": {
+                **self.resources.describe(),
+                "lowest_share": self.load.lowest if self.load else None,
+                "backoffs": self.load.backoffs if self.load else None,
+            },
+            "shared": {
+                "worker": self.claims.worker, "remote": self.remote_count, "reclaimed": self.claims.reclaimed,
+            } if self.claims else None,
+            "results": results,
+        }
+
+    def _estimate(self, results):
+        # Dry runs only: what a real run would write and roughly how long it would take with the current limits
+        planned = [r for r in results if r["status"] in ("would-copy", "would-convert")]
+        busy = {"copy": 0.0, "transcode": 0.0}
+        for r in planned:
+            busy["transcode" if r["status"] == "would-convert" else "copy"] += r.get("estimated_seconds", 0)
+        return {
+            "already_done": sum(1 for r in results if r["status"] == "skipped"),
+            "matching": sum(1 for r in planned if r["status"] == "would-copy"),
+            "changing": sum(1 for r in planned if r["status"] == "would-convert"),
+            "duplicates": sum(1 for r in results if r["status"] == "would-deduplicate"),
+            "output_bytes": sum(r.get("estimated_bytes", 0) for r in planned),
+            "seconds": round(max(busy["transcode"] / self.max_jobs, busy["copy"] / self.copy_jobs), 1),
+            "from_history": self.history.measured,
+        }
+
+    def _volume_labels(self):
+        if self._input_volume == self._output_volume:
+            return {self._input_volume: "input+output"}
+        return {self._input_volume: "input", self._output_volume: "output"}
+
+    def write_report(self, folder=None):
+        # Writes the report as JSON and CSV under <output>/.proxymate-reports and returns both paths
+        report = self.report()
+        folder = folder or os.path.join(self.output_folder, REPORT_DIR)
+        os.makedirs(folder, exist_ok=True)
+        stem = os.path.join(folder, "run-" + time.strftime("%Y%m%d-%H%M%S"))
+        if self.claims:
+            stem += "-" + self.claims.worker  # several workers may finish in the same second
+        write_json_atomic(stem + ".json", report)
+        with open(stem + ".csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(report["results"])
+        return stem + ".json", stem + ".csv"
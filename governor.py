@@ -0,0 +1,239 @@
+# governor.py
+# Keeps conversions from getting in the way of whatever else the machine is doing (usually an NLE playing back).
+# ResourcePolicy lowers the CPU/IO priority of every ffmpeg/ffprobe child, can pin them to some cores and caps
+# ffmpeg's thread count; LoadMonitor shrinks the number of running jobs while the system is under pressure.
+import ctypes
+import ctypes.util
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILES = {
+    # Same as running without a policy
+    "foreground": {"nice": 0, "io_class": None, "threads": None, "yield_to_load": False},
+    # For machines someone is working on: low priority, fewer threads, and back off while the system is busy
+    "background": {"nice": 10, "io_class": "best-effort", "threads": "auto", "yield_to_load": True},
+}
+IO_CLASSES = {"best-effort": 2, "idle": 3}  # ioprio classes; best-effort gets the lowest level (7)
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+# ioprio_set has no libc wrapper
+IOPRIO_SET = {"x86_64": 251, "i386": 289, "i686": 289, "aarch64": 30, "armv7l": 314, "ppc64le": 273}
+
+LOAD_CHECK_INTERVAL = 5.0
+PRESSURE_HIGH = 0.30  # PSI: share of time some task waited for CPU or IO; loadavg: runnable tasks per core
+PRESSURE_LOW = 0.10
+LOAD_HIGH = 1.0
+LOAD_LOW = 0.7
+MIN_SHARE = 0.1  # ceilings never go below one job anyway
+
+
+def parse_cpus(text):
+    # "0-3,6" -> {0, 1, 2, 3, 6}
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.update(range(int(first), int(last or first) + 1))
+    if not cpus:
+        raise ValueError("no CPUs given")
+    return cpus
+
+
+def usable_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+_thread_state = threading.local()
+
+
+def _ioprio_set(tid, io_class):
+    number = IOPRIO_SET.get(platform.machine())
+    if number is None:
+        return False
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    level = 7 if io_class == IO_CLASSES["best-effort"] else 0
+    return libc.syscall(number, IOPRIO_WHO_PROCESS, tid, (io_class << IOPRIO_CLASS_SHIFT) | level) == 0
+
+
+class ResourcePolicy:
+    # What every spawned child runs with. None for a setting means "leave it as it is".
+    def __init__(self, profile="foreground", nice=None, io_class=None, cpus=None, threads=None, yield_to_load=None):
+        defaults = PROFILES[profile]
+        self.profile = profile
+        self.nice = defaults["nice"] if nice is None else nice
+        self.io_class = defaults["io_class"] if io_class is None else io_class
+        self.cpus = set(cpus) if cpus else None
+        self.threads = defaults["threads"] if threads is None else threads
+        self.yield_to_load = defaults["yield_to_load"] if yield_to_load is None else yield_to_load
+
+    def thread_count(self, jobs):
+        # ffmpeg -threads for one of `jobs` concurrent jobs; "auto" splits the usable cores between them
+        if self.threads == "auto":
+            return max(1, (len(self.cpus) if self.cpus else usable_cpus()) // max(jobs, 1))
+        return self.threads
+
+    def ffmpeg_args(self, jobs):
+        threads = self.thread_count(jobs)
+        return ["-threads", str(threads)] if threads else []
+
+    def popen_kwargs(self):
+        if sys.platform == "win32" and self.nice > 0:
+            return {"creationflags": subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+        return {}
+
+    def apply_to_thread(self):
+        # Linux: priority, IO class and affinity are per thread and children inherit them from the thread that
+        # spawns them, so each worker thread takes them on once; its own copying and hashing then run at the same
+        # priority and every child starts with them
+        if not sys.platform.startswith("linux") or getattr(_thread_state, "applied", None) is self:
+            return
+        tid = threading.get_native_id()
+        try:
+            if self.nice:
+                os.setpriority(os.PRIO_PROCESS, tid, max(os.getpriority(os.PRIO_PROCESS, tid), self.nice))
+            if self.io_class:
+                _ioprio_set(tid, IO_CLASSES[self.io_class])
+            if self.cpus:
+                os.sched_setaffinity(tid, self.cpus)
+        except OSError:
+            pass  # e.g. CPUs that don't exist here; the job still runs
+        _thread_state.applied = self
+
+    def after_spawn(self, pid):
+        # Elsewhere the priority is per process and only settable from outside once the child exists
+        if sys.platform.startswith("linux") or sys.platform == "win32" or not self.nice:
+            return
+        try:
+            os.setpriority(os.PRIO_PROCESS, pid, self.nice)
+        except OSError:
+            pass
+
+    def describe(self):
+        return {
+            "profile": self.profile,
+            "nice": self.nice,
+            "io_class": self.io_class,
+            "cpus": sorted(self.cpus) if self.cpus else None,
+            "threads": self.threads,
+            "yield_to_load": self.yield_to_load,
+        }
+
+
+def _psi(resource):
+    # "some avg10" from /proc/pressure/<resource> as a fraction, or None without PSI (non-Linux, older kernels)
+    try:
+        with open(f"/proc/pressure/{resource}", "r", encoding="utf-8") as f:
+            first = f.readline()
+    except OSError:
+        return None
+    for field in first.split():
+        if field.startswith("avg10="):
+            return float(field[6:]) / 100
+    return None
+
+
+def process_cpu_seconds(pid):
+    # CPU time of a live child (and of anything it has reaped) from /proc; None where that isn't available
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as f:
+            fields = f.read().rpartition(")")[2].split()
+        return sum(int(v) for v in fields[11:15]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def own_cpu_seconds(live_pids=()):
+    # CPU used by this process and its children so far. Reaped children are in RUSAGE_CHILDREN; running ones are
+    # read from /proc on Linux (elsewhere they count once they exit).
+    total = 0.0
+    if resource is not None:
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+            usage = resource.getrusage(who)
+            total += usage.ru_utime + usage.ru_stime
+    for pid in live_pids:
+        total += process_cpu_seconds(pid) or 0.0
+    return total
+
+
+def system_pressure():
+    # (pressure, high mark, low mark, source): PSI for CPU and IO where available, else 1-minute loadavg per core
+    readings = [p for p in (_psi("cpu"), _psi("io")) if p is not None]
+    if readings:
+        return max(readings), PRESSURE_HIGH, PRESSURE_LOW, "psi"
+    try:
+        return os.getloadavg()[0] / usable_cpus(), LOAD_HIGH, LOAD_LOW, "loadavg"
+    except (AttributeError, OSError):
+        return None, None, None, None
+
+
+class LoadMonitor:
+    # Share of each job limit that may be used: halved while the system is under pressure, grown back by a quarter
+    # once it calms down. Checks at most every few seconds, from whichever thread asks.
+    # PSI and loadavg include the batch's own ffmpeg children, which alone can keep a machine "busy". With
+    # `own_cpu` (cumulative CPU seconds of the batch, e.g. own_cpu_seconds) the cores the batch used since the
+    # last check are taken off the reading, so only load from other programs makes it back off.
+    def __init__(self, on_change=None, interval=LOAD_CHECK_INTERVAL, sampler=system_pressure, own_cpu=None,
+                 cpus=None, clock=time.monotonic):
+        self.on_change = on_change  # called with (old share, new share, pressure, source)
+        self.interval = interval
+        self.sampler = sampler  # () -> (pressure, high mark, low mark, source), like system_pressure()
+        self.own_cpu = own_cpu
+        self.cpus = cpus or usable_cpus()
+        self.clock = clock
+        self.share = 1.0
+        self.lowest = 1.0
+        self.backoffs = 0
+        self._lock = threading.Lock()
+        self._checked = None
+        self._own_seen = None  # (time, own CPU seconds) at the last check
+
+    def _check(self):
+        with self._lock:
+            now = self.clock()
+            if self._checked is not None and now - self._checked < self.interval:
+                return None
+            self._checked = now
+            pressure, high, low, source = self.sampler()
+            if pressure is None:
+                return None
+            pressure = max(pressure - self._own_load(now), 0.0)
+            old = self.share
+            if pressure > high:
+                self.share = max(old / 2, MIN_SHARE)
+                self.backoffs += 1
+            elif pressure < low:
+                self.share = min(old + 0.25, 1.0)
+            self.lowest = min(self.lowest, self.share)
+            if self.share == old:
+                return None
+            return old, self.share, pressure, source
+
+    def _own_load(self, now):
+        # Under the lock: cores' worth of CPU the batch used since the last check, as a fraction of all cores
+        if self.own_cpu is None:
+            return 0.0
+        cpu = self.own_cpu()
+        seen, self._own_seen = self._own_seen, (now, cpu)
+        if seen is None or now <= seen[0]:
+            return 0.0
+        return max(cpu - seen[1], 0.0) / (now - seen[0]) / self.cpus
+
+    def ceiling(self, maximum):
+        change = self._check()
+        if change and self.on_change:
+            self.on_change(*change)
+        return max(1, int(maximum * self.share))
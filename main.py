@@ -1,31 +1,55 @@
 # main.py
 import sys
 import os
-import subprocess
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QUrl
+import functools
+import shutil
+import threading
+from collections import deque
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QUrl, QRect
 from PyQt5.QtGui import QIcon, QPixmap, QColor, QPainter, QPen, QRadialGradient
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QFrame, QDialog,
     QFileDialog, QLineEdit, QProgressBar, QTextEdit, QHBoxLayout,
     QComboBox, QSizePolicy, QMessageBox, QGraphicsOpacityEffect, QStackedLayout,
-    QGraphicsDropShadowEffect, QTextBrowser
+    QGraphicsDropShadowEffect, QTextBrowser, QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView,
+    QListWidget, QListWidgetItem, QAbstractItemView
 )
-
-if sys.platform == "darwin":
+from engine import (LOG_DIR, LOG_LEVELS, PREFLIGHT_COLUMNS, ConversionEngine, JobManifest, default_job_count,
+                    find_binary, log_level, preflight_rows, summarize_report)
+from governor import ResourcePolicy
+
+def set_dock_icon():
+    # macOS only. AppKit is slow to import, so this runs after the window is on screen rather than at import
+    if sys.platform != "darwin":
+        return
     from AppKit import NSApplication, NSImage
-    def set_dock_icon(icns_path):
-        if os.path.exists(icns_path):
-            app = NSApplication.sharedApplication()
-            image = NSImage.alloc().initByReferencingFile_(icns_path)
-            if image and image.isValid():
-                app.setApplicationIconImage_(image)
-    icon_path = os.path.join(getattr(sys, "_MEIPASS", os.getcwd()), "app.icns")
-    set_dock_icon(icon_path)
+    icns_path = os.path.join(getattr(sys, "_MEIPASS", os.getcwd()), "app.icns")
+    if os.path.exists(icns_path):
+        app = NSApplication.sharedApplication()
+        image = NSImage.alloc().initByReferencingFile_(icns_path)
+        if image and image.isValid():
+            app.setApplicationIconImage_(image)
+
+
+def warm_up():
+    # Find ffmpeg/ffprobe and measure the audio encoders (cached after the first launch) on a background thread,
+    # so neither happens on the GUI thread when Start is pressed
+    from encoders import EncoderSelector
+    find_binary("ffprobe")
+    EncoderSelector(find_binary("ffmpeg")).load()
 
 def resource_path(relative_path):
     return os.path.join(getattr(sys, '_MEIPASS', os.path.abspath('.')), relative_path)
 
 
+def remove_path(path):
+    # Output folders can now hold mirrored subfolders, not just files
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
 class DropOverlay(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -61,13 +85,49 @@ class DropOverlay(QWidget):
         layout.addSpacing(12)
 
         # === Pulse animation setup ===
+        # The timer only runs while the overlay is on screen (see showEvent/hideEvent)
         self.glow_radius = 0
         self.growing = True
         self.pulse_timer = QTimer(self)
+        self.pulse_timer.setInterval(30)
         self.pulse_timer.timeout.connect(self.update_glow)
-        QTimer.singleShot(100, lambda: self.pulse_timer.start(30))
+
+        # Dark fill + frost tiling never change between frames; rendered once per size in build_backdrop()
+        self.backdrop = None
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.pulse_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.pulse_timer.stop()
+
+    def build_backdrop(self):
+        ratio = self.devicePixelRatioF()
+        backdrop = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        backdrop.setDevicePixelRatio(ratio)
+        backdrop.fill(Qt.transparent)
+        painter = QPainter(backdrop)
+
+        # Darken background
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 235))
+
+        # Optional frost noise texture (dimmed)
+        if not self.frost_texture.isNull():
+            painter.setOpacity(0.08)
+            painter.drawTiledPixmap(self.rect(), self.frost_texture)
+        painter.end()
+        self.backdrop = backdrop
+
+    def glow_rect(self):
+        # Bounding box of the glow ellipse at the current radius, plus the pen width
+        center = self.card.geometry().center()
+        radius = int(max(self.card.width(), self.card.height()) // 2 + self.glow_radius) + 3
+        return QRect(center.x() - radius, center.y() - radius, radius * 2, radius * 2)
 
     def update_glow(self):
+        before = self.glow_rect()
         if self.growing:
             self.glow_radius += 0.6
             if self.glow_radius >= 15:
@@ -77,30 +137,26 @@ class DropOverlay(QWidget):
             if self.glow_radius <= 0:
                 self.growing = True
 
-        # 🔐 Only update when the widget is shown and laid out
+        # 🔐 Only update when the widget is shown and laid out; the old rect covers the shrinking half of the pulse
         if self.isVisible() and self.width() > 0 and self.height() > 0:
-            self.update()
+            self.update(before.united(self.glow_rect()))
 
     def resizeEvent(self, event):
         self.card.move(
             (self.width() - self.card.width()) // 2,
             (self.height() - self.card.height()) // 2
         )
+        self.backdrop = None
 
     def paintEvent(self, event):
+        if self.backdrop is None:
+            self.build_backdrop()
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
+        painter.setClipRect(event.rect())
 
-        # Darken background
-        painter.fillRect(self.rect(), QColor(0, 0, 0, 235))
-
-        # Optional frost noise texture (dimmed)
-        if not self.frost_texture.isNull():
-            painter.setOpacity(0.08)
-            for y in range(0, self.height(), self.frost_texture.height()):
-                for x in range(0, self.width(), self.frost_texture.width()):
-                    painter.drawPixmap(x, y, self.frost_texture)
-            painter.setOpacity(1.0)
+        # Static layers, only the part being repainted
+        painter.drawPixmap(event.rect(), self.backdrop, self._device_rect(event.rect()))
 
         # Neon glow
         center = self.card.geometry().center()
@@ -120,8 +176,12 @@ class DropOverlay(QWidget):
             int(radius * 2)
         )
 
+    def _device_rect(self, rect):
+        ratio = self.backdrop.devicePixelRatio()
+        return QRect(int(rect.x() * ratio), int(rect.y() * ratio), int(rect.width() * ratio), int(rect.height() * ratio))
+
 class CustomConfirmDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, resumable=False):
         super().__init__(parent)
         self.setWindowTitle("Output Folder Not Empty")
         self.setModal(True)
@@ -153,7 +213,11 @@ class CustomConfirmDialog(QDialog):
         layout = QVBoxLayout(self)
         layout.addStretch()
 
-        label = QLabel("The output folder is not empty.\n\nDo you want to delete all files in it?")
+        if resumable:
+            label = QLabel("The output folder has files from a previous run.\n\n"
+                           "Delete all files and start over? Choose No to resume where it left off.")
+        else:
+            label = QLabel("The output folder is not empty.\n\nDo you want to delete all files in it?")
         label.setWordWrap(True)
         layout.addWidget(label)
 
@@ -174,79 +238,274 @@ class CustomConfirmDialog(QDialog):
         btn_layout.addWidget(self.btn_yes)
         layout.addLayout(btn_layout)
 
+TOOL_DIALOG_STYLE = """
+    QDialog {
+        background-color: #1e1e1e;
+        border: 1px solid #292929;
+    }
+    QLabel {
+        color: #bbb9b7;
+        font-size: 13px;
+    }
+    QTableWidget, QListWidget {
+        background-color: #171718;
+        color: #bbb9b7;
+        gridline-color: #292929;
+        border: 1px solid #292929;
+        border-radius: 8px;
+        font-size: 12px;
+    }
+    QListWidget::item:selected {
+        background-color: #242424;
+        color: #ffffff;
+    }
+    QHeaderView::section {
+        background-color: #1e1e1e;
+        color: #888888;
+        border: none;
+        padding: 4px;
+    }
+    QPushButton {
+        background-color: #2b2b2b;
+        color: #bbb9b7;
+        border: 1px solid #444;
+        border-radius: 8px;
+        padding: 8px 16px;
+        min-width: 70px;
+    }
+    QPushButton:hover {
+        background-color: #333;
+        border: 1px solid #666;
+    }
+"""
+
+
+class PreflightDialog(QDialog):
+    # Result of a dry run: summary on top, one row per file, and a button to go ahead with the real run
+    def __init__(self, parent, report):
+        super().__init__(parent)
+        self.setWindowTitle("Preview")
+        self.setModal(True)
+        self.resize(640, 480)
+        self.setStyleSheet(TOOL_DIALOG_STYLE)
+
+        layout = QVBoxLayout(self)
+        summary = QLabel("\n".join(summarize_report(report)) or "Nothing to do.")
+        summary.setWordWrap(True)
+        layout.addWidget(summary)
+
+        rows = preflight_rows(report)
+        table = QTableWidget(len(rows), len(PREFLIGHT_COLUMNS))
+        table.setHorizontalHeaderLabels(PREFLIGHT_COLUMNS)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectRows)
+        for r, row in enumerate(rows):
+            for c, text in enumerate(row):
+                table.setItem(r, c, QTableWidgetItem(text))
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for c in range(1, len(PREFLIGHT_COLUMNS)):
+            table.horizontalHeader().setSectionResizeMode(c, QHeaderView.ResizeToContents)
+        layout.addWidget(table)
+
+        btn_layout = QHBoxLayout()
+        close_btn = QPushButton("Close")
+        start_btn = QPushButton("Start Processing")
+        close_btn.clicked.connect(self.reject)
+        start_btn.clicked.connect(self.accept)
+        btn_layout.addStretch()
+        btn_layout.addWidget(close_btn)
+        btn_layout.addWidget(start_btn)
+        layout.addLayout(btn_layout)
+
+
+class QueueDialog(QDialog):
+    # Live view of a running batch: what's running, what's waiting (in order), pause/resume and move-to-front
+    def __init__(self, parent, engine):
+        super().__init__(parent)
+        self.engine = engine
+        self.setWindowTitle("Queue")
+        self.resize(420, 480)
+        self.setStyleSheet(TOOL_DIALOG_STYLE)
+        self._shown = None
+
+        layout = QVBoxLayout(self)
+        self.status = QLabel("")
+        layout.addWidget(self.status)
+        self.list = QListWidget()
+        self.list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        layout.addWidget(self.list)
+
+        btn_layout = QHBoxLayout()
+        self.pause_btn = QPushButton("Pause")
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        front_btn = QPushButton("Move to Front")
+        front_btn.clicked.connect(self.move_to_front)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(self.pause_btn)
+        btn_layout.addWidget(front_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+        self.refresh()
+
+    def refresh(self):
+        snapshot = self.engine.queue_snapshot()
+        self.pause_btn.setText("Resume" if snapshot["paused"] else "Pause")
+        state = "Paused" if snapshot["paused"] else "Running"
+        self.status.setText(f"{state} · {len(snapshot['running'])} in progress · {len(snapshot['pending'])} waiting")
+        if snapshot == self._shown:
+            return
+        self._shown = snapshot
+
+        # Rebuild only when something changed, keeping the selection and scroll position
+        selected = {item.data(Qt.UserRole) for item in self.list.selectedItems()}
+        scroll = self.list.verticalScrollBar().value()
+        self.list.clear()
+        for file in snapshot["running"]:
+            item = QListWidgetItem(f"▶  {file}")
+            item.setFlags(Qt.ItemIsEnabled)
+            self.list.addItem(item)
+        for file in snapshot["pending"]:
+            item = QListWidgetItem(f"    {file}")
+            item.setData(Qt.UserRole, file)
+            self.list.addItem(item)
+            item.setSelected(file in selected)
+        self.list.verticalScrollBar().setValue(scroll)
+
+    def toggle_pause(self):
+        if self.engine.paused:
+            self.engine.resume()
+        else:
+            self.engine.pause()
+        self.refresh()
+
+    def move_to_front(self):
+        files = [item.data(Qt.UserRole) for item in self.list.selectedItems() if item.data(Qt.UserRole)]
+        if files:
+            self.engine.prioritize(files)
+            self.list.scrollToTop()
+            self.refresh()
+
+
+class LogBuffer:
+    # Hand-off from worker threads to the GUI. Lines are queued here instead of one signal each,
+    # and the deque is bounded so a busy UI can't make it grow without limit.
+    def __init__(self, maxlen=5000):
+        self._lines = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._dropped = 0
+
+    def push(self, level, text):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+            self._lines.append((level, text))
+
+    def drain(self):
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped = self._dropped, 0
+        return lines, dropped
+
+
+class ConsoleSink:
+    # Flushes a LogBuffer into the console every 100 ms as a single append, keeping only the last MAX_LINES
+    MAX_LINES = 2000
+
+    def __init__(self, console):
+        self.console = console
+        self.console.document().setMaximumBlockCount(self.MAX_LINES)
+        self.min_level = "info"
+        self.buffer = None
+        self.timer = QTimer(console)
+        self.timer.setInterval(100)
+        self.timer.timeout.connect(self.flush)
+
+    def attach(self, buffer):
+        self.buffer = buffer
+        self.timer.start()
+
+    def detach(self):
+        self.flush()
+        self.timer.stop()
+        self.buffer = None
+
+    def flush(self):
+        if self.buffer is None:
+            return
+        lines, dropped = self.buffer.drain()
+        threshold = LOG_LEVELS.index(self.min_level)
+        shown = [text for level, text in lines if LOG_LEVELS.index(level) >= threshold]
+        if dropped:
+            shown.insert(0, f"… {dropped} lines skipped (full ffmpeg logs are in {LOG_DIR} in the output folder)")
+        if shown:
+            self.console.append("\n".join(shown))
+
+
 class FFmpegWorker(QThread):
     progress = pyqtSignal(int)
-    log = pyqtSignal(str)
+    file_progress = pyqtSignal(str, float)
+    stats = pyqtSignal(object)  # {"percent", "speed", "mb_per_sec", "eta"}
     finished = pyqtSignal(int)
 
 
-    def __init__(self, input_folder, output_folder, audio_channels):
+    def __init__(self, input_folder, output_folder, audio_channels, max_jobs=None, recursive=False, dry_run=False,
+                 profile="foreground"):
         super().__init__()
-        self.processed_count = 0  # add to __init__
-        self.input_folder = input_folder
-        self.output_folder = output_folder
-        self.audio_channels = audio_channels
-        self.ffmpeg_path = os.path.join(getattr(sys, "_MEIPASS", os.getcwd()), "ffmpeg")
-        self.ffprobe_path = os.path.join(getattr(sys, "_MEIPASS", os.getcwd()), "ffprobe")
-        self._is_cancelled = False  # Add this line
-        self._process = None  # add to __init__
-
-    def cancel(self):  # Add this method
-        self._is_cancelled = True
+        self.dry_run = dry_run
+        # The engine is built in run(): loading the probe cache and checking volumes is too slow for the GUI thread
+        self.engine = None
+        self._make_engine = functools.partial(ConversionEngine, input_folder, output_folder, audio_channels, max_jobs,
+                                              recursive=recursive, dry_run=dry_run, resources=ResourcePolicy(profile))
+        self._cancel_requested = False
+        self.report_path = None
+        self.log_buffer = LogBuffer()
+
+    def _build_engine(self):
+        # All the conversion work lives in engine.py so the CLI can run it without Qt
+        engine = self._make_engine()
+        engine.progress.connect(self.progress.emit)
+        engine.file_progress.connect(self.file_progress.emit)
+        engine.stats.connect(self.stats.emit)
+        engine.log.connect(lambda message: self.log_buffer.push(log_level(message), message))
+        engine.ffmpeg_log.connect(lambda file, line: self.log_buffer.push("ffmpeg", f"[{file}] {line}"))
+        return engine
+
+    @property
+    def _is_cancelled(self):
+        return self._cancel_requested or (self.engine is not None and self.engine.cancelled)
+
+    @property
+    def skipped_count(self):
+        return self.engine.skipped_count if self.engine else 0
+
+    def cancel(self):
+        # May come before run() has built the engine; run() checks the flag once it has
+        self._cancel_requested = True
+        engine = self.engine
+        if engine is not None:
+            engine.cancel()
 
     def run(self):
         try:
-            files = [f for f in os.listdir(self.input_folder) if f.lower().endswith(('.mp4', '.mov'))]
-            total = len(files)
-
-            for idx, file in enumerate(files):
-                if self._is_cancelled:
-                    self.log.emit("⚠️ Processing cancelled by user.\n")
-                    return
-
-                input_path = os.path.join(self.input_folder, file)
-                output_path = os.path.join(self.output_folder, file)
-                probe_cmd = [
-                    self.ffprobe_path, "-v", "error", "-select_streams", "a:0",
-                    "-show_entries", "stream=channels", "-of", "default=noprint_wrappers=1:nokey=1", input_path
-                ]
-                try:
-                    result = subprocess.run(probe_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                    current_channels = int(result.stdout.strip())
-                except Exception as e:
-                    self.log.emit(f"❌ Failed to analyze {file}: {e}")
-                    continue
-
-                if current_channels == self.audio_channels:
-                    self.log.emit(f"📁 Copying {file} (already {self.audio_channels} channels)\n")
-                    try:
-                        import shutil
-                        shutil.copy2(input_path, output_path)
-                        self.processed_count += 1
-                    except Exception as e:
-                        self.log.emit(f"❌ Failed to copy {file}: {e}")
-                    self.progress.emit(int(((idx + 1) / total) * 100))
-                    continue
-
-                cmd = [self.ffmpeg_path, "-i", input_path, "-ac", str(self.audio_channels), "-c:v", "copy", "-c:a",
-                       "aac", output_path]
-                self.log.emit(f"🎬 Processing {file} → {self.audio_channels}ch\n")
-                self.log.emit(" ".join(cmd) + "\n")
-
-                self._process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-                for line in self._process.stdout:
-                    if self._is_cancelled:
-                        self._process.terminate()
-                        self.log.emit("⚠️ FFmpeg process terminated.\n")
-                        self._process.wait()
-                        return
-                    self.log.emit(line.strip())
-                self._process.wait()
-                self.processed_count += 1  # ← count processed file
-                self.progress.emit(int(((idx + 1) / total) * 100))
-
+            self.engine = self._build_engine()
+            if self._cancel_requested:
+                self.engine.cancel()
+            self.engine.run()
+            if not self.engine.dry_run:
+                self.report_path, _ = self.engine.write_report()
+        except Exception as e:
+            self.log_buffer.push("error", f"❌ {e}")
         finally:
-            self.finished.emit(self.processed_count)
+            self.finished.emit(self.engine.processed_count if self.engine else 0)
 
 
 class CHNNLApp(QWidget):
@@ -257,15 +516,36 @@ class CHNNLApp(QWidget):
         self.setWindowTitle("ProxyMate")
         self.setFixedSize(464, 800)
         self.processing = False
+        self.queue_dialog = None
+        self.drop_overlay = None  # built on the first drag; it decodes two more images
+        self.first_painted = False
 
-        self.init_ui()
-        self.drop_overlay = DropOverlay(self)
-        self.drop_overlay.setGeometry(self.rect())
-        self.drop_overlay.raise_()
+        # Stylesheet first, once, so the widgets below are polished a single time
         self.set_dark_style()
+        self.init_ui()
+
+    def overlay(self):
+        if self.drop_overlay is None:
+            self.drop_overlay = DropOverlay(self)
+        return self.drop_overlay
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_painted:
+            self.first_painted = True
+            # Queued from the first paint rather than from show(), so it runs once the window is actually on screen
+            QTimer.singleShot(0, self.after_first_paint)
+
+    def after_first_paint(self):
+        self.load_assets()
+        set_dock_icon()
+
+    def load_assets(self):
+        # The logo is the biggest image and isn't needed to lay out the window
+        self.logo_pixmap = QPixmap(resource_path("assets/proxymate_logo.png"))
+        self.logo_label.setPixmap(self.logo_pixmap)
 
     def init_ui(self):
-        self.set_dark_style()
 
         # === Base container ===
         base = QWidget()
@@ -281,12 +561,12 @@ class CHNNLApp(QWidget):
 
         # === Background logo image ===
         self.logo_label = QLabel()
-        self.logo_pixmap = QPixmap(resource_path("assets/proxymate_logo.png"))
-        self.logo_label.setPixmap(self.logo_pixmap)
         self.logo_label.lower()
         self.logo_label.setScaledContents(True)
         self.logo_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         # self.logo_label.setFixedHeight(290)  # height of the visible image portion
+        # The logo fills the window; its final size is set now so nothing moves when the pixmap arrives
+        self.logo_label.setFixedSize(self.size())
         self.logo_label.setStyleSheet("background-color: #000000;")
         stack.addWidget(self.logo_label)
 
@@ -329,9 +609,9 @@ class CHNNLApp(QWidget):
         layout.addLayout(output_row)
 
         # === Channels ===
-        layout.addWidget(QLabel("Number of Audio Channels"))
+        layout.addWidget(QLabel("Number of Audio Channels  (⌘/Ctrl-click to output several)"))
         self.channel_btns = []
-        self.selected_channel = 1
+        self.selected_channels = {1}
 
         channel_btn_layout = QHBoxLayout()
         channel_btn_layout.setSpacing(7)
@@ -353,15 +633,54 @@ class CHNNLApp(QWidget):
         layout.addWidget(channel_btn_container)
         self.select_channel(1)
 
-        # === Start Button ===
+        # === Parallel Jobs ===
+        jobs_row = QHBoxLayout()
+        self.recursive_check = QCheckBox("Include subfolders")
+        self.recursive_check.setStyleSheet("color: #bbb9b7;")
+        jobs_row.addWidget(self.recursive_check)
+        self.background_check = QCheckBox("Background mode")
+        self.background_check.setToolTip("Lower priority and fewer jobs while the system is busy, "
+                                         "so playback in your editor stays smooth")
+        self.background_check.setStyleSheet("color: #bbb9b7;")
+        jobs_row.addWidget(self.background_check)
+        jobs_row.addStretch()
+        jobs_row.addWidget(QLabel("Parallel Jobs"))
+        self.jobs_combo = QComboBox()
+        self.jobs_combo.addItem(f"Auto ({default_job_count()})", None)
+        for n in (1, 2, 4, 8, 16, 32):
+            self.jobs_combo.addItem(str(n), n)
+        self.jobs_combo.setFixedWidth(120)
+        self.jobs_combo.setStyleSheet(self.combo_style())
+        jobs_row.addWidget(self.jobs_combo)
+        layout.addLayout(jobs_row)
+
+        # === Start / Preview Buttons ===
+        start_row = QHBoxLayout()
+        self.preview_btn = QPushButton("Preview")
+        self.preview_btn.clicked.connect(self.start_preview)
+        self.preview_btn.setFixedSize(120, 50)
+        start_row.addWidget(self.preview_btn)
         self.start_btn = QPushButton("Start Processing")
         self.start_btn.clicked.connect(self.start_processing)
-        self.start_btn.setFixedSize(418, 50)
-        layout.addWidget(self.start_btn)
+        self.start_btn.setFixedSize(290, 50)
+        start_row.addWidget(self.start_btn)
+        layout.addLayout(start_row)
 
 
 
         # === Console ===
+        console_row = QHBoxLayout()
+        console_row.addWidget(QLabel("Console"))
+        console_row.addStretch()
+        self.log_level_combo = QComboBox()
+        for label, level in (("Status", "info"), ("Warnings", "warning"), ("Errors", "error"), ("FFmpeg output", "ffmpeg")):
+            self.log_level_combo.addItem(label, level)
+        self.log_level_combo.setFixedWidth(150)
+        self.log_level_combo.setStyleSheet(self.combo_style())
+        self.log_level_combo.currentIndexChanged.connect(self.set_log_level)
+        console_row.addWidget(self.log_level_combo)
+        layout.addLayout(console_row)
+
         self.console = QTextEdit()
         self.console.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.console.setReadOnly(True)
@@ -381,12 +700,18 @@ class CHNNLApp(QWidget):
             "ProxyMate is ready.\n\n1. Select input folder of proxy files.\n2. Select output folder for processed proxies.\n3. Choose number of audio channels to match OCF.\n4. Click 'Start', sit back.\n\nPSA: Never process original camera files.\n\nUse at your own risk.\n"
         )
         layout.addWidget(self.console)
+        self.console_sink = ConsoleSink(self.console)
 
         # === Progress Bar ===
         self.progress_bar = QProgressBar()
         self.progress_bar.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.progress_bar)
 
+        self.stats_label = QLabel("")
+        self.stats_label.setAlignment(Qt.AlignCenter)
+        self.stats_label.setStyleSheet("color: #888888; font-size: 11px;")
+        layout.addWidget(self.stats_label)
+
         footer = QTextBrowser()
         footer.setHtml("""
             <div style="text-align: center;">
@@ -412,13 +737,24 @@ class CHNNLApp(QWidget):
         layout.addWidget(footer)
 
     def select_channel(self, number):
-        self.selected_channel = number
+        # Plain click picks one count; Cmd/Ctrl-click toggles extra counts so several variants come out of one pass
+        if QApplication.keyboardModifiers() & Qt.ControlModifier:
+            if number in self.selected_channels and len(self.selected_channels) > 1:
+                self.selected_channels.discard(number)
+            else:
+                self.selected_channels.add(number)
+        else:
+            self.selected_channels = {number}
         for btn in self.channel_btns:
-            is_selected = btn.text() == str(number)
+            is_selected = int(btn.text()) in self.selected_channels
             btn.setProperty("selected", is_selected)
             btn.style().unpolish(btn)
             btn.style().polish(btn)
 
+    def set_log_level(self):
+        # Only affects what reaches the console from now on; everything ffmpeg prints is still on disk
+        self.console_sink.min_level = self.log_level_combo.currentData()
+
     def select_input_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Input Folder")
         if folder:
@@ -429,6 +765,65 @@ class CHNNLApp(QWidget):
         if folder:
             self.output_path.setText(folder)
 
+    def start_preview(self):
+        # Probe everything and show what a run would do, without writing to the output folder.
+        # While a real run is going this button opens the queue instead.
+        if self.processing:
+            if self.worker.dry_run:
+                self.worker.cancel()
+            else:
+                self.show_queue()
+            return
+
+        input_folder = self.input_path.text()
+        output_folder = self.output_path.text()
+        if not input_folder or not os.path.exists(input_folder):
+            self.console.append("<span style='font-family: Apple Color Emoji;'>⚠️ </span> Input folder is missing or invalid.")
+            return
+        if output_folder and os.path.abspath(input_folder) == os.path.abspath(output_folder):
+            self.console.append(
+                "<span style='font-family: Apple Color Emoji;'>🛑️ </span> Input and output folders must be different.\n")
+            return
+
+        # Without an output folder nothing counts as done yet; the scratch path is never written to
+        self.worker = FFmpegWorker(input_folder, output_folder or os.path.join(input_folder, ".proxymate-preview"),
+                                   sorted(self.selected_channels), self.jobs_combo.currentData(),
+                                   recursive=self.recursive_check.isChecked(), dry_run=True)
+        self.worker.progress.connect(self.progress_bar.setValue)
+        self.console_sink.attach(self.worker.log_buffer)
+        self.worker.finished.connect(self.on_preview_finished)
+        self.processing = True
+        self.start_btn.setEnabled(False)
+        self.preview_btn.setText("Cancel")
+        self.console.append("🔎 Analyzing input folder...\n")
+        self.worker.start()
+
+    def on_preview_finished(self, processed_count):
+        self.console_sink.detach()
+        cancelled = self.worker._is_cancelled
+        report = self.worker.engine.report() if self.worker.engine else None
+        self.worker.deleteLater()
+        del self.worker
+        self.processing = False
+        self.start_btn.setEnabled(True)
+        self.preview_btn.setText("Preview")
+        self.progress_bar.setValue(0)
+        if cancelled:
+            self.console.append("❌  Preview was cancelled.\n")
+            return
+        if report is None:
+            return  # the engine couldn't start; the error is already in the console
+        if PreflightDialog(self, report).exec_() == QDialog.Accepted:
+            self.start_processing()
+
+    def show_queue(self):
+        if self.worker.engine is None:
+            return  # still starting up
+        if self.queue_dialog is None:
+            self.queue_dialog = QueueDialog(self, self.worker.engine)
+        self.queue_dialog.show()
+        self.queue_dialog.raise_()
+
     def start_processing(self):
         if self.processing:
             self.worker.cancel()
@@ -437,7 +832,7 @@ class CHNNLApp(QWidget):
 
         input_folder = self.input_path.text()
         output_folder = self.output_path.text()
-        audio_channels = self.selected_channel
+        audio_channels = sorted(self.selected_channels)
 
         if not input_folder or not os.path.exists(input_folder):
             self.console.append("<span style='font-family: Apple Color Emoji;'>⚠️ </span> Input folder is missing or invalid.")
@@ -453,13 +848,13 @@ class CHNNLApp(QWidget):
             return
 
         if os.path.exists(output_folder) and os.listdir(output_folder):
-            dialog = CustomConfirmDialog(self)
+            dialog = CustomConfirmDialog(self, resumable=JobManifest.exists(output_folder))
             reply = dialog.exec_()
 
             if reply == QDialog.Accepted:
                 for f in os.listdir(output_folder):
                     try:
-                        os.remove(os.path.join(output_folder, f))
+                        remove_path(os.path.join(output_folder, f))
                     except Exception as e:
                         self.console.append(f"❌ Failed to delete {f}: {e}\n")
             elif reply == QDialog.Rejected:
@@ -469,16 +864,19 @@ class CHNNLApp(QWidget):
             if reply == QMessageBox.Yes:
                 for f in os.listdir(output_folder):
                     try:
-                        os.remove(os.path.join(output_folder, f))
+                        remove_path(os.path.join(output_folder, f))
                     except Exception as e:
                         self.console.append(f"❌ Failed to delete {f}: {e}\n")
             elif reply == QMessageBox.Cancel:
                 self.console.append("🚫 Operation cancelled by user.\n")
                 return
 
-        self.worker = FFmpegWorker(input_folder, output_folder, int(audio_channels))
+        self.worker = FFmpegWorker(input_folder, output_folder, audio_channels, self.jobs_combo.currentData(),
+                                   recursive=self.recursive_check.isChecked(),
+                                   profile="background" if self.background_check.isChecked() else "foreground")
         self.worker.progress.connect(self.progress_bar.setValue)
-        self.worker.log.connect(self.console.append)
+        self.worker.stats.connect(self.update_stats)
+        self.console_sink.attach(self.worker.log_buffer)
         self.worker.finished.connect(self.on_processing_finished)
 
 
@@ -489,19 +887,46 @@ class CHNNLApp(QWidget):
         else:
             self.start_btn.setStyleSheet("background-color: #e0e0e0; color: white;")
         self.start_btn.setText("Cancel Processing")
+        self.preview_btn.setText("Queue")
         self.worker.start()
 
+    def update_stats(self, stats):
+        parts = []
+        if stats["speed"]:
+            parts.append(f"{stats['speed']:.1f}x")
+        if stats["mb_per_sec"]:
+            parts.append(f"{stats['mb_per_sec']:.1f} MB/s")
+        if stats["eta"] is not None:
+            minutes, seconds = divmod(int(stats["eta"]), 60)
+            hours, minutes = divmod(minutes, 60)
+            parts.append(f"ETA {hours:d}:{minutes:02d}:{seconds:02d}" if hours else f"ETA {minutes:02d}:{seconds:02d}")
+        self.stats_label.setText("  ·  ".join(parts))
+
     def on_processing_finished(self, processed_count):
+        self.console_sink.detach()
         if hasattr(self, "worker") and self.worker._is_cancelled:
             self.console.append("❌  Processing was cancelled.\n")
             self.progress_bar.setValue(0)
         else:
             self.console.append(f"\n\n✅ {processed_count} file{'s' if processed_count != 1 else ''} processed.\n")
+            if self.worker.skipped_count:
+                self.console.append(f"⏭️ {self.worker.skipped_count} already up to date.\n")
+            if self.worker.engine is not None:
+                for line in summarize_report(self.worker.engine.report()):
+                    self.console.append(line)
+            if self.worker.report_path:
+                self.console.append(f"\n📝 Run report: {self.worker.report_path}\n")
             self.progress_bar.setValue(100)
 
+        self.stats_label.setText("")
         self.start_btn.setEnabled(True)
         self.start_btn.setText("Start")
         self.start_btn.setStyleSheet("")
+        self.preview_btn.setText("Preview")
+        if self.queue_dialog is not None:
+            self.queue_dialog.close()
+            self.queue_dialog.deleteLater()
+            self.queue_dialog = None
         self.processing = False
 
         self.worker.deleteLater()
@@ -510,16 +935,17 @@ class CHNNLApp(QWidget):
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             event.acceptProposedAction()
-            if not self.drop_overlay.isVisible():
-                self.drop_overlay.setGeometry(self.rect())
-                self.drop_overlay.raise_()
-                self.drop_overlay.setVisible(True)
+            overlay = self.overlay()
+            if not overlay.isVisible():
+                overlay.setGeometry(self.rect())
+                overlay.raise_()
+                overlay.setVisible(True)
 
     def dragLeaveEvent(self, event):
-        self.drop_overlay.setVisible(False)
+        self.overlay().setVisible(False)
 
     def dropEvent(self, event):
-        self.drop_overlay.setVisible(False)
+        self.overlay().setVisible(False)
         urls = event.mimeData().urls()
         paths = [url.toLocalFile() for url in urls]
         folders = [p for p in paths if os.path.isdir(p)]
@@ -551,6 +977,36 @@ class CHNNLApp(QWidget):
             }
         """
 
+    def combo_style(self):
+        caret = resource_path("assets/caret-down.svg").replace(os.sep, "/")
+        return """
+            QComboBox {
+                background-color: #1e1e1e;
+                color: #bbb9b7;
+                border: 1px solid #292929;
+                border-radius: 8px;
+                padding: 6px 12px;
+            }
+            QComboBox:hover {
+                border: 1px solid #666;
+            }
+            QComboBox::drop-down {
+                border: none;
+                width: 24px;
+            }
+            QComboBox::down-arrow {
+                image: url(%s);
+                width: 12px;
+                height: 12px;
+            }
+            QComboBox QAbstractItemView {
+                background-color: #1e1e1e;
+                color: #bbb9b7;
+                selection-background-color: #242424;
+                border: 1px solid #292929;
+            }
+        """ % caret
+
     def set_dark_style(self):
         self.setStyleSheet("""
             QWidget {
@@ -629,8 +1085,15 @@ class CHNNLApp(QWidget):
 
 
 
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
+def show_window():
     window = CHNNLApp()
     window.show()
+    # The logo and dock icon wait for the first paint (see CHNNLApp.paintEvent); probing ffmpeg starts right away
+    threading.Thread(target=warm_up, daemon=True).start()
+    return window
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = show_window()
     sys.exit(app.exec_())
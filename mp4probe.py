@@ -0,0 +1,281 @@
+# mp4probe.py
+# In-process probe for MP4/MOV: walks the ISO-BMFF box tree (moov/trak/mdia/minf/stbl/stsd) of a memory-mapped file
+# and returns the same dict as engine.parse_probe, without starting ffprobe. Anything it can't read with confidence
+# raises UnsupportedMedia so the caller can fall back to ffprobe.
+import mmap
+import os
+import struct
+
+MP4_EXTENSIONS = (".mov", ".mp4", ".m4v", ".m4a", ".3gp")
+FORMAT_NAME = "mov,mp4,m4a,3gp,3g2,mj2"  # what ffprobe reports for this demuxer
+TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid", b"junk"}
+
+VIDEO_CODECS = {
+    b"avc1": "h264", b"avc3": "h264", b"hvc1": "hevc", b"hev1": "hevc", b"dvh1": "hevc", b"av01": "av1",
+    b"vp09": "vp9", b"mp4v": "mpeg4", b"jpeg": "mjpeg", b"mjpa": "mjpeg", b"apch": "prores", b"apcn": "prores",
+    b"apcs": "prores", b"apco": "prores", b"ap4h": "prores", b"ap4x": "prores", b"AVdh": "dnxhd", b"AVdn": "dnxhd",
+}
+AUDIO_CODECS = {b"ac-3": "ac3", b"ec-3": "eac3", b"alac": "alac", b"Opus": "opus", b"fLaC": "flac",
+                b".mp3": "mp3", b"raw ": "pcm_u8"}
+ESDS_CODECS = {0x40: "aac", 0x66: "aac", 0x67: "aac", 0x68: "aac", 0x69: "mp3", 0x6B: "mp3",
+               0xA5: "ac3", 0xA6: "eac3"}
+# AAC channelConfiguration -> channel count (0 means a program config element we don't parse)
+AAC_CHANNELS = {1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 6, 7: 8, 11: 7, 12: 8, 14: 8}
+AAC_SAMPLE_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350)
+# QuickTime 'chan' layout tags (tag >> 16) -> ffmpeg layout names
+CHAN_LAYOUTS = {100: "mono", 101: "stereo", 102: "stereo", 103: "stereo", 108: "quad", 113: "3.0", 117: "5.0",
+                121: "5.1", 122: "5.1", 123: "5.1", 124: "5.1", 125: "6.1", 126: "7.1", 127: "7.1", 128: "7.1"}
+DEFAULT_LAYOUTS = {1: "mono", 2: "stereo", 3: "3.0", 4: "4.0", 5: "5.0", 6: "5.1", 7: "6.1", 8: "7.1"}
+
+
+class UnsupportedMedia(ValueError):
+    pass
+
+
+def _boxes(buf, start, end):
+    # (type, payload start, box end) for each box between start and end
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", buf, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset  # runs to the end of the parent (or file)
+        if size < header or offset + size > end:
+            raise UnsupportedMedia(f"truncated {kind!r} box")
+        yield kind, offset + header, offset + size
+        offset += size
+
+
+def _child(buf, start, end, *path):
+    # Payload range of the first box found by following `path` down from [start, end), or None
+    for kind in path:
+        for child, child_start, child_end in _boxes(buf, start, end):
+            if child == kind:
+                start, end = child_start, child_end
+                break
+        else:
+            return None
+    return start, end
+
+
+def _media_header(buf, start):
+    # mvhd/mdhd: (timescale, duration); version 1 uses 64-bit times
+    version = buf[start]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", buf, start + 20)
+        unknown = duration == 0xFFFFFFFFFFFFFFFF
+    else:
+        timescale, duration = struct.unpack_from(">II", buf, start + 12)
+        unknown = duration == 0xFFFFFFFF
+    if not timescale or unknown:
+        return None
+    return timescale, duration
+
+
+def _descriptor(buf, offset):
+    # MPEG-4 descriptor header: (tag, payload start, payload end)
+    tag = buf[offset]
+    size = 0
+    offset += 1
+    for _ in range(4):
+        byte = buf[offset]
+        offset += 1
+        size = (size << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return tag, offset, offset + size
+
+
+def _parse_esds(buf, start, end):
+    # (codec name, channels or None, sample rate or None) from an esds box
+    tag, offset, limit = _descriptor(buf, start + 4)
+    if tag != 0x03:
+        raise UnsupportedMedia("esds without ES descriptor")
+    flags = buf[offset + 2]
+    offset += 3
+    if flags & 0x80:
+        offset += 2
+    if flags & 0x40:
+        offset += 1 + buf[offset]
+    if flags & 0x20:
+        offset += 2
+    tag, offset, limit = _descriptor(buf, offset)
+    if tag != 0x04:
+        raise UnsupportedMedia("esds without decoder config")
+    codec = ESDS_CODECS.get(buf[offset])
+    if codec is None:
+        raise UnsupportedMedia(f"esds object type 0x{buf[offset]:02x}")
+    if codec != "aac":
+        return codec, None, None
+
+    offset += 13
+    if offset >= limit:
+        raise UnsupportedMedia("AAC without AudioSpecificConfig")
+    tag, offset, limit = _descriptor(buf, offset)
+    bits = int.from_bytes(bytes(buf[offset:min(limit, offset + 8)]).ljust(8, b"\0"), "big")
+    pos = 64
+
+    def take(count):
+        nonlocal pos
+        pos -= count
+        return (bits >> pos) & ((1 << count) - 1)
+
+    if take(5) == 31:
+        take(6)
+    index = take(4)
+    rate = take(24) if index == 15 else (AAC_SAMPLE_RATES[index] if index < len(AAC_SAMPLE_RATES) else None)
+    channels = AAC_CHANNELS.get(take(4))
+    if channels is None:
+        raise UnsupportedMedia("AAC channel layout in a program config element")
+    return "aac", channels, rate
+
+
+def _pcm_name(fourcc, bits, little_endian, is_float=False):
+    if is_float:
+        return f"pcm_f{bits}{'le' if little_endian else 'be'}"
+    if bits == 8:
+        return "pcm_s8" if fourcc in (b"twos", b"sowt", b"lpcm", b"ipcm") else "pcm_u8"
+    return f"pcm_s{bits}{'le' if little_endian else 'be'}"
+
+
+def _audio_entry(buf, start, end, fourcc):
+    # A sound sample description (QuickTime v0/v1/v2 or ISO): (codec, channels, sample rate, layout)
+    version = struct.unpack_from(">H", buf, start + 8)[0]
+    if version == 2:
+        rate = struct.unpack_from(">d", buf, start + 32)[0]
+        channels, _, bits, flags = struct.unpack_from(">IIII", buf, start + 40)
+        children = start + 64
+    else:
+        channels, bits = struct.unpack_from(">HH", buf, start + 16)
+        rate = struct.unpack_from(">I", buf, start + 24)[0] >> 16
+        flags = 0
+        children = start + 28 + (16 if version == 1 else 0)
+    rate = int(rate) or None
+
+    def find(*path):
+        found = _child(buf, children, end, *path)
+        if found is None and path[0] != b"wave":
+            found = _child(buf, children, end, b"wave", *path)  # QuickTime nests codec boxes in 'wave'
+        return found
+
+    little_endian = False
+    enda = find(b"enda")
+    if enda and enda[1] - enda[0] >= 2:
+        little_endian = struct.unpack_from(">H", buf, enda[0])[0] == 1
+
+    if fourcc == b"mp4a":
+        esds = find(b"esds")
+        if esds is None:
+            raise UnsupportedMedia("mp4a without esds")
+        codec, esds_channels, esds_rate = _parse_esds(buf, *esds)
+        channels = esds_channels or channels
+        rate = esds_rate or rate
+    elif fourcc == b"sowt":
+        codec = _pcm_name(fourcc, bits, True)
+    elif fourcc == b"twos":
+        codec = _pcm_name(fourcc, bits, False)
+    elif fourcc in (b"in24", b"in32"):
+        codec = _pcm_name(fourcc, int(fourcc[2:]), little_endian)
+    elif fourcc in (b"fl32", b"fl64"):
+        codec = _pcm_name(fourcc, int(fourcc[2:]), little_endian, is_float=True)
+    elif fourcc == b"lpcm":
+        # kAudioFormatFlagIsFloat = 1, IsBigEndian = 2
+        codec = _pcm_name(fourcc, bits, not flags & 2, is_float=bool(flags & 1))
+    elif fourcc in (b"ipcm", b"fpcm"):
+        pcmc = find(b"pcmC")
+        if pcmc is None:
+            raise UnsupportedMedia(f"{fourcc.decode()} without pcmC")
+        endian_flag, bits = buf[pcmc[0] + 4], buf[pcmc[0] + 5]
+        codec = _pcm_name(fourcc, bits, bool(endian_flag & 1), is_float=fourcc == b"fpcm")
+    elif fourcc in AUDIO_CODECS:
+        codec = AUDIO_CODECS[fourcc]
+    else:
+        raise UnsupportedMedia(f"audio codec {fourcc!r}")
+
+    if not channels:
+        raise UnsupportedMedia("no channel count")
+    layout = None
+    chan = find(b"chan")
+    if chan and chan[1] - chan[0] >= 8:
+        layout = CHAN_LAYOUTS.get(struct.unpack_from(">I", buf, chan[0] + 4)[0] >> 16)
+    return codec, channels, rate, layout or DEFAULT_LAYOUTS.get(channels)
+
+
+def _track(buf, start, end, index):
+    mdia = _child(buf, start, end, b"mdia")
+    if mdia is None:
+        raise UnsupportedMedia("track without mdia")
+    mdhd = _child(buf, *mdia, b"mdhd")
+    hdlr = _child(buf, *mdia, b"hdlr")
+    stsd = _child(buf, *mdia, b"minf", b"stbl", b"stsd")
+    if mdhd is None or hdlr is None or stsd is None:
+        raise UnsupportedMedia("incomplete track")
+    header = _media_header(buf, mdhd[0])
+    duration = header[1] / header[0] if header else None
+    handler = bytes(buf[hdlr[0] + 8:hdlr[0] + 12])
+
+    stream = {
+        "index": index, "codec_type": "data", "codec_name": None, "channels": None,
+        "channel_layout": None, "sample_rate": None, "duration": duration,
+    }
+    entries = list(_boxes(buf, stsd[0] + 8, stsd[1]))
+    if handler in (b"soun", b"vide") and not entries:
+        raise UnsupportedMedia("track without sample description")
+    if handler == b"soun":
+        fourcc, entry_start, entry_end = entries[0]
+        codec, channels, rate, layout = _audio_entry(buf, entry_start, entry_end, fourcc)
+        stream.update(codec_type="audio", codec_name=codec, channels=channels, channel_layout=layout,
+                      sample_rate=rate)
+    elif handler == b"vide":
+        fourcc = entries[0][0]
+        stream.update(codec_type="video", codec_name=VIDEO_CODECS.get(fourcc, fourcc.decode("latin-1").strip()))
+    elif handler in (b"sbtl", b"text", b"subt", b"clcp"):
+        stream["codec_type"] = "subtitle"
+    return stream
+
+
+def probe_mp4(path):
+    # Same shape as engine.parse_probe(ffprobe JSON); raises UnsupportedMedia for anything it can't vouch for
+    if os.path.splitext(path)[1].lower() not in MP4_EXTENSIONS:
+        raise UnsupportedMedia("not an MP4/MOV file")
+    with open(path, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise UnsupportedMedia("empty file")
+    try:
+        return _parse(buf)
+    except (struct.error, IndexError) as e:
+        raise UnsupportedMedia(f"malformed header ({e})")
+    finally:
+        buf.close()
+
+
+def _parse(buf):
+    size = len(buf)
+    if size < 8 or buf[4:8] not in TOP_LEVEL:
+        raise UnsupportedMedia("not an ISO-BMFF file")
+    moov = _child(buf, 0, size, b"moov")
+    if moov is None:
+        raise UnsupportedMedia("no moov box (still being written?)")
+    if _child(buf, *moov, b"mvex") is not None:
+        raise UnsupportedMedia("fragmented MP4")
+
+    streams = []
+    for kind, start, end in _boxes(buf, *moov):
+        if kind == b"trak":
+            streams.append(_track(buf, start, end, len(streams)))
+    if not streams:
+        raise UnsupportedMedia("no tracks")
+
+    mvhd = _child(buf, *moov, b"mvhd")
+    header = _media_header(buf, mvhd[0]) if mvhd else None
+    duration = header[1] / header[0] if header and header[1] else None
+    if duration is None:
+        duration = max((s["duration"] or 0 for s in streams), default=0) or None
+    if duration is None:
+        raise UnsupportedMedia("unknown duration")
+    return {"format": FORMAT_NAME, "duration": duration, "streams": streams}
@@ -0,0 +1,240 @@
+# scheduler.py
+# How many jobs may touch the disks at once, and in which order they start. On network volumes the limits follow
+# measured throughput (AIMD: one more job while throughput holds up, half as many when it drops), and new jobs
+# wait while the output volume is nearly full.
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+NETWORK_FILESYSTEMS = {
+    "nfs", "nfs4", "cifs", "smb", "smb2", "smb3", "smbfs", "afpfs", "webdav", "davfs", "fuse.sshfs",
+    "9p", "ceph", "glusterfs", "fuse.glusterfs", "lustre",
+}
+WINDOW = 5.0  # seconds of traffic per AIMD decision
+CONGESTION_DROP = 0.15  # throughput falling this much between windows counts as congestion
+DEFAULT_MIN_FREE = 2 * 1024 ** 3
+DISK_CHECK_INTERVAL = 2.0
+
+
+def _existing(path):
+    # The output folder may not exist yet; its nearest existing parent lives on the same volume
+    path = os.path.abspath(path)
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return path
+
+
+def _mounts():
+    # [(mount point, filesystem type)] from /proc/mounts on Linux, or `mount` output on macOS/BSD
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        mounts = []
+        for line in lines:
+            parts = line.split()
+            if len(parts) >= 3:
+                # Spaces etc. in mount points are octal escapes (\040)
+                point = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), parts[1])
+                mounts.append((point, parts[2]))
+        return mounts
+    except OSError:
+        pass
+    if sys.platform == "win32":
+        return []
+    try:
+        result = subprocess.run(["mount"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except OSError:
+        return []
+    # "//user@nas/proxies on /Volumes/proxies (smbfs, nodev, nosuid, mounted by me)"
+    return [(m.group(1), m.group(2)) for m in re.finditer(r" on (.+?) \(([^,)]+)", result.stdout)]
+
+
+def filesystem_type(path):
+    path = _existing(path)
+    best, fstype = "", None
+    for point, kind in _mounts():
+        inside = path == point or path.startswith(point.rstrip(os.sep) + os.sep)
+        if inside and len(point) > len(best):
+            best, fstype = point, kind
+    return fstype
+
+
+def is_network_path(path):
+    return filesystem_type(path) in NETWORK_FILESYSTEMS
+
+
+def volume_of(path):
+    return os.stat(_existing(path)).st_dev
+
+
+class DiskSpaceGuard:
+    # Says when free space on the output volume is below `min_free` bytes; checks at most every couple of seconds
+    def __init__(self, path, min_free=DEFAULT_MIN_FREE, on_change=None):
+        self.path = path
+        self.min_free = min_free
+        self.on_change = on_change  # called with (low, free_bytes) whenever the state flips
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._low = False
+
+    def free(self):
+        try:
+            return shutil.disk_usage(_existing(self.path)).free
+        except OSError:
+            return None
+
+    def low(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked < DISK_CHECK_INTERVAL:
+                return self._low
+            self._checked = now
+            free = self.free()
+            low = free is not None and free < self.min_free
+            changed = low != self._low
+            self._low = low
+        if changed and self.on_change:
+            self.on_change(low, free)
+        return low
+
+
+class AdaptiveLimit:
+    # A semaphore whose size moves between 1 and `maximum` with the throughput of the jobs holding it
+    def __init__(self, name, maximum, adaptive=False, paused=None, on_change=None, window=WINDOW, ceiling=None):
+        self.name = name
+        self.maximum = max(1, maximum)
+        self.adaptive = adaptive
+        self.limit = min(2, self.maximum) if adaptive else self.maximum
+        self.active = 0
+        self.paused = paused  # callable; while it returns True no new job starts
+        self.on_change = on_change  # called with (name, old, new, MB/s) after each adjustment
+        self.ceiling = ceiling  # callable(maximum) -> at most this many jobs right now, e.g. while the system is busy
+        self.window = window
+        self._cond = threading.Condition()
+        self._bytes = 0
+        self._busiest = 0
+        self._window_start = time.monotonic()
+        self._last_rate = None
+
+    def acquire(self, should_stop):
+        # Blocks until a slot is free; returns False instead if should_stop() becomes true while waiting
+        with self._cond:
+            while True:
+                if should_stop():
+                    return False
+                if self.active < self.allowed() and not (self.paused and self.paused()):
+                    break
+                self._cond.wait(1.0)
+            self.active += 1
+            self._busiest = max(self._busiest, self.active)
+        return True
+
+    def allowed(self):
+        return min(self.limit, self.ceiling(self.maximum)) if self.ceiling else self.limit
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def wake(self):
+        # Re-check `paused` now instead of at the next one-second tick
+        with self._cond:
+            self._cond.notify_all()
+
+    def add_bytes(self, count):
+        change = None
+        with self._cond:
+            self._bytes += count
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed >= self.window:
+                change = self._adjust(self._bytes / elapsed)
+                self._bytes = 0
+                self._busiest = self.active
+                self._window_start = now
+        if change and self.on_change:
+            self.on_change(self.name, *change)
+
+    def _adjust(self, rate):
+        if not self.adaptive:
+            return None
+        old = self.limit
+        if self._last_rate and rate < self._last_rate * (1 - CONGESTION_DROP):
+            self.limit = max(1, self.limit // 2)
+        elif self._busiest >= self.limit and self.limit < self.maximum:
+            self.limit += 1  # only grow while every slot was actually in use
+        self._last_rate = rate
+        if self.limit == old:
+            return None
+        self._cond.notify_all()
+        return old, self.limit, rate / 1_000_000
+
+
+class VolumeMeter:
+    # Bytes read and written per volume (st_dev) over the run, for the report
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.volumes = {}
+
+    def add(self, volume, read=0, written=0):
+        with self._lock:
+            counts = self.volumes.setdefault(volume, [0, 0])
+            counts[0] += read
+            counts[1] += written
+
+    def summary(self, names=None):
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        names = names or {}
+        with self._lock:
+            return {
+                names.get(volume, str(volume)): {
+                    "bytes_read": read,
+                    "bytes_written": written,
+                    "read_mb_per_sec": round(read / elapsed / 1_000_000, 2),
+                    "write_mb_per_sec": round(written / elapsed / 1_000_000, 2),
+                }
+                for volume, (read, written) in self.volumes.items()
+            }
+
+
+class JobQueue:
+    # Jobs waiting for a worker, in dispatch order. prioritize() moves files to the front while the batch runs.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}  # file -> job; dicts keep insertion order
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def push(self, file, job, front=False):
+        with self._lock:
+            if front:
+                self._jobs = {file: job, **self._jobs}
+            else:
+                self._jobs[file] = job
+
+    def pop(self):
+        # Front job as (file, job), or None if empty
+        with self._lock:
+            if not self._jobs:
+                return None
+            file = next(iter(self._jobs))
+            return file, self._jobs.pop(file)
+
+    def prioritize(self, files):
+        # Moves the given files (in that order) ahead of everything else; returns the ones that were queued here
+        with self._lock:
+            moved = [f for f in files if f in self._jobs]
+            self._jobs = {**{f: self._jobs[f] for f in moved}, **self._jobs}
+            return moved
+
+    def files(self):
+        with self._lock:
+            return list(self._jobs)
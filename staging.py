@@ -0,0 +1,256 @@
+# staging.py
+# Optional scratch-disk staging for proxies on network shares. Inputs are copied to a local disk a few jobs ahead of
+# their turn, ffmpeg reads and writes locally, and finished outputs are uploaded in the background, so transfers
+# overlap with encoding instead of adding to it.
+import ctypes
+import itertools
+import os
+import re
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_SCRATCH_CAP = 50 * 1024 ** 3
+DEFAULT_PREFETCH = 2
+TRANSFER_JOBS = 2  # parallel prefetches, and separately parallel uploads
+FOLDER_RE = re.compile(r"^proxymate-staging-(\d+)$")
+STILL_ACTIVE = 259  # Windows exit code of a process that hasn't exited
+
+
+def process_running(pid):
+    if sys.platform == "win32":
+        # os.kill() would terminate the process here
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5  # access denied: it exists
+        code = ctypes.c_ulong()
+        ok = kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return not ok or code.value == STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # someone else's
+    return True
+
+
+def remove_abandoned(parent):
+    # Deletes staging folders of runs that crashed or were killed (their process is gone); returns bytes freed
+    freed = 0
+    try:
+        names = os.listdir(parent)
+    except OSError:
+        return 0
+    for name in names:
+        match = FOLDER_RE.match(name)
+        if not match or int(match.group(1)) == os.getpid() or process_running(int(match.group(1))):
+            continue
+        folder = os.path.join(parent, name)
+        for root, _, files in os.walk(folder):
+            for f in files:
+                try:
+                    freed += os.path.getsize(os.path.join(root, f))
+                except OSError:
+                    pass
+        shutil.rmtree(folder, ignore_errors=True)
+    return freed
+
+
+class Stager:
+    # `copy(src, dst, on_bytes)` does the actual transfers (engine.place_file in copy mode);
+    # `on_read`/`on_write` get byte counts as data comes off / goes back to the network volumes;
+    # `on_full` is called with (full, bytes waiting to upload) whenever full() flips
+    def __init__(self, folder, cap=DEFAULT_SCRATCH_CAP, prefetch=DEFAULT_PREFETCH, copy=None,
+                 on_read=None, on_write=None, on_full=None):
+        self.abandoned_bytes = remove_abandoned(folder)  # left on the disk by earlier runs that didn't finish
+        self.folder = os.path.join(folder, f"proxymate-staging-{os.getpid()}")
+        self.cap = cap
+        self.prefetch_depth = prefetch
+        self._copy = copy
+        self._on_read = on_read or (lambda count: None)
+        self._on_write = on_write or (lambda count: None)
+        self._on_full = on_full or (lambda full, waiting: None)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (path, size, mtime_ns) -> entry; least recently used first
+        self._size = 0  # inputs plus outputs waiting to upload
+        self._out_size = 0  # outputs waiting to upload
+        self._full = False
+        self._names = itertools.count()
+        self._uploads = set()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(self.folder, "in"), exist_ok=True)
+        os.makedirs(os.path.join(self.folder, "out"), exist_ok=True)
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=TRANSFER_JOBS)
+        self._upload_pool = ThreadPoolExecutor(max_workers=TRANSFER_JOBS)
+
+    # === Input cache ===
+    def _key(self, src):
+        st = os.stat(src)
+        return (os.path.abspath(src), st.st_size, st.st_mtime_ns), st.st_size
+
+    def _make_room(self, size):
+        # Under the lock: evict idle entries, oldest first, until `size` more bytes fit under the cap
+        if size > self.cap:
+            return False
+        for key in list(self._entries):
+            if self._size + size <= self.cap:
+                break
+            entry = self._entries[key]
+            if entry["users"] == 0 and entry["future"].done():
+                self._evict(key)
+        return self._size + size <= self.cap
+
+    def _evict(self, key):
+        entry = self._entries.pop(key)
+        self._size -= entry["size"]
+        try:
+            os.remove(entry["path"])
+        except OSError:
+            pass
+
+    def _start(self, key, size, src, users):
+        # Under the lock: reserve space and register an entry whose future completes when the copy is on disk
+        name = f"{next(self._names)}{os.path.splitext(src)[1]}"
+        entry = {"path": os.path.join(self.folder, "in", name), "size": size, "users": users, "future": Future()}
+        self._entries[key] = entry
+        self._size += size
+        return entry
+
+    def _fetch(self, key, src, entry):
+        try:
+            self._copy(src, entry["path"], self._on_read)
+            entry["future"].set_result(entry["path"])
+        except Exception as e:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._evict(key)
+            entry["future"].set_exception(e)
+
+    def prefetch(self, src):
+        # Start copying `src` in the background unless it's already local or there's no room for it
+        try:
+            key, size = self._key(src)
+        except OSError:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            if not self._make_room(size):
+                return
+            entry = self._start(key, size, src, users=0)
+        self._prefetch_pool.submit(self._fetch, key, src, entry)
+
+    def acquire(self, src):
+        # Local copy of `src` for the duration of a job (waits for a prefetch in flight, or copies now).
+        # Returns None when it doesn't fit in the scratch space; the caller then reads from the share directly.
+        key, size = self._key(src)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                entry["users"] += 1
+                fetch = False
+            else:
+                self.misses += 1
+                if not self._make_room(size):
+                    return None
+                entry = self._start(key, size, src, users=1)
+                fetch = True
+        if fetch:
+            self._fetch(key, src, entry)
+        try:
+            return entry["future"].result()
+        except Exception:
+            with self._lock:
+                entry["users"] -= 1
+            return None
+
+    def release(self, local_path):
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["path"] == local_path:
+                    entry["users"] -= 1
+                    break
+
+    # === Outputs ===
+    def output_path(self, ext):
+        return os.path.join(self.folder, "out", f"{next(self._names)}{ext}")
+
+    def _upload(self, local, final, temp):
+        try:
+            self._copy(local, temp, self._on_write)
+            if os.path.getsize(temp) != os.path.getsize(local):
+                raise OSError("upload is incomplete")
+            os.replace(temp, final)
+        except Exception:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            raise
+        finally:
+            try:
+                os.remove(local)
+            except OSError:
+                pass
+
+    def full(self):
+        # True while outputs waiting to upload, plus the inputs in use, take up the whole cap: nothing idle is
+        # left to evict, so the caller should hold off new transcodes until uploads catch up
+        with self._lock:
+            busy = sum(e["size"] for e in self._entries.values() if e["users"] or not e["future"].done())
+            full = self._out_size > 0 and self._out_size + busy >= self.cap
+            changed = full != self._full
+            self._full = full
+            waiting = self._out_size
+        if changed:
+            self._on_full(full, waiting)
+        return full
+
+    def upload(self, local, final, temp, on_done):
+        # Copy a finished local output to `temp` next to `final`, rename it into place, then call on_done(error).
+        # Until it's uploaded the output counts against the cap.
+        size = os.path.getsize(local)
+
+        def job():
+            try:
+                self._upload(local, final, temp)
+                error = None
+            except Exception as e:
+                error = e
+            with self._lock:
+                self._size -= size
+                self._out_size -= size
+            on_done(error)
+
+        with self._lock:
+            self._size += size
+            self._out_size += size
+            future = self._upload_pool.submit(job)
+            self._uploads.add(future)
+        future.add_done_callback(self._uploads.discard)
+
+    def wait_uploads(self):
+        while True:
+            with self._lock:
+                pending = list(self._uploads)
+            if not pending:
+                return
+            for future in pending:
+                future.exception()  # waits; errors were already handed to on_done
+
+    def close(self, cancel=False):
+        # Finishes (or with cancel=True, drops) queued uploads and deletes the scratch folder
+        self._prefetch_pool.shutdown(wait=True, cancel_futures=True)
+        if not cancel:
+            self.wait_uploads()
+        self._upload_pool.shutdown(wait=True, cancel_futures=cancel)
+        shutil.rmtree(self.folder, ignore_errors=True)
@@ -0,0 +1,98 @@
+import json
+import os
+import time
+
+import claims
+from claims import ClaimBoard
+
+
+def stalled_claim(board, file, generation=1):
+    # A claim left by a worker that stopped heartbeating a while ago
+    path = board._path(file)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"file": file, "worker": "stalled", "generation": generation}, f)
+    old = time.time() - 10 * board.lease
+    os.utime(path, (old, old))
+    return path
+
+
+def test_stale_claim_is_taken_over(tmp_path):
+    board = ClaimBoard(str(tmp_path), lease=1, worker="a")
+    try:
+        stalled_claim(board, "x.mov")
+        assert board.claim("x.mov")
+        assert board.owns("x.mov")
+        assert board.reclaimed == 1
+    finally:
+        board.close()
+
+
+def test_takeover_landing_between_stat_and_read_is_not_stolen(tmp_path, monkeypatch):
+    first = ClaimBoard(str(tmp_path), lease=1, worker="first")
+    second = ClaimBoard(str(tmp_path), lease=1, worker="second")
+    try:
+        stalled_claim(first, "x.mov")
+        real_read = claims._read
+
+        def read_after_takeover(path):
+            # `second` has already seen the stale claim; `first` finishes its takeover before the read
+            monkeypatch.setattr(claims, "_read", real_read)
+            assert first.claim("x.mov")
+            return real_read(path)
+
+        monkeypatch.setattr(claims, "_read", read_after_takeover)
+        assert not second.claim("x.mov")
+        assert first.owns("x.mov")
+        assert second.reclaimed == 0
+    finally:
+        first.close()
+        second.close()
+
+
+def test_unreadable_claim_is_taken_over_once_stale(tmp_path):
+    board = ClaimBoard(str(tmp_path), lease=1, worker="a")
+    try:
+        path = board._path("x.mov")
+        open(path, "w").close()  # crash between creating and writing the claim
+        assert not board.claim("x.mov")
+        old = time.time() - 10
+        os.utime(path, (old, old))
+        assert board.claim("x.mov")
+    finally:
+        board.close()
+
+
+def test_orphaned_takeover_marker_expires(tmp_path):
+    board = ClaimBoard(str(tmp_path), lease=1, worker="a")
+    try:
+        path = stalled_claim(board, "x.mov")
+        marker = f"{path}.takeover-1"
+        open(marker, "w").close()
+        assert not board.claim("x.mov")  # a takeover may still be in progress
+        old = time.time() - 10
+        os.utime(marker, (old, old))
+        assert board.claim("x.mov")
+    finally:
+        board.close()
+
+
+def test_partials_are_kept_only_while_their_writer_holds_the_claim(tmp_path):
+    from engine import remove_partials
+
+    out = tmp_path / "out"
+    (out / "sub").mkdir(parents=True)
+    writer = ClaimBoard(str(tmp_path / "claims"), lease=5, worker="host-a-4242")
+    other = ClaimBoard(str(tmp_path / "claims"), lease=5, worker="host-b-777")
+    try:
+        assert writer.claim(os.path.join("sub", "held.mov"))  # writer paused, but still heartbeating
+        assert other.claim("taken.mov")  # taken over from the writer
+        old = time.time() - 100
+        for name in ("sub/.held.partial-4242.mov", ".taken.partial-4242.mov", ".released.partial-4242.mov"):
+            path = out / name
+            path.touch()
+            os.utime(path, (old, old))
+        assert remove_partials(str(out), 5, writer.held_by) == 2
+        assert [p.name for p in out.rglob("*.mov")] == [".held.partial-4242.mov"]
+    finally:
+        writer.close()
+        other.close()
@@ -0,0 +1,65 @@
+from governor import LOAD_HIGH, LOAD_LOW, LoadMonitor
+
+
+class FakeSystem:
+    # Load readings and the batch's own CPU use, advanced by hand instead of sampled from the machine
+    def __init__(self, cpus=8):
+        self.cpus = cpus
+        self.now = 0.0
+        self.own_seconds = 0.0
+        self.pressure = 0.0
+
+    def step(self, seconds, own_cores, foreign_per_core):
+        # `own_cores` busy with the batch's ffmpeg plus other programs adding `foreign_per_core` of load per core
+        self.now += seconds
+        self.own_seconds += own_cores * seconds
+        self.pressure = own_cores / self.cpus + foreign_per_core
+
+    def sample(self):
+        return self.pressure, LOAD_HIGH, LOAD_LOW, "loadavg"
+
+
+def monitor(system, own_cpu=True):
+    return LoadMonitor(interval=5, sampler=system.sample, own_cpu=(lambda: system.own_seconds) if own_cpu else None,
+                       cpus=system.cpus, clock=lambda: system.now)
+
+
+def test_own_load_alone_does_not_throttle():
+    system = FakeSystem()
+    load = monitor(system)
+    load.ceiling(4)
+    for _ in range(10):
+        system.step(5, own_cores=8, foreign_per_core=0.1)  # idle machine, the batch uses every core
+        assert load.ceiling(4) == 4
+    assert load.backoffs == 0
+
+
+def test_without_own_cpu_the_batch_throttles_itself():
+    system = FakeSystem()
+    load = monitor(system, own_cpu=False)
+    system.step(5, own_cores=8, foreign_per_core=0.1)
+    assert load.ceiling(4) == 2
+
+
+def test_foreign_load_still_throttles_and_recovers():
+    system = FakeSystem()
+    load = monitor(system)
+    load.ceiling(4)
+    system.step(5, own_cores=6, foreign_per_core=1.5)  # an editor playing back
+    assert load.ceiling(4) == 2
+    for _ in range(4):
+        system.step(5, own_cores=4, foreign_per_core=0.0)
+        load.ceiling(4)
+    assert load.ceiling(4) == 4
+    assert load.lowest == 0.5
+
+
+def test_checks_are_rate_limited():
+    system = FakeSystem()
+    load = monitor(system, own_cpu=False)
+    load.ceiling(4)
+    system.pressure = 5.0
+    system.now += 1
+    assert load.ceiling(4) == 4  # too soon for another look
+    system.now += 5
+    assert load.ceiling(4) == 2
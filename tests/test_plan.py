@@ -0,0 +1,38 @@
+import pytest
+
+from engine import plan_conversion
+
+
+def probe(*audio):
+    # Minimal probe result: one video stream and an audio stream per (codec, channels)
+    streams = [{"index": 0, "codec_type": "video", "codec_name": "h264", "channels": None}]
+    streams += [{"index": i + 1, "codec_type": "audio", "codec_name": codec, "channels": channels}
+                for i, (codec, channels) in enumerate(audio)]
+    return {"format": "mov", "duration": 10.0, "streams": streams}
+
+
+def codec_of(plan):
+    args = plan["args"]
+    return args[args.index("-c:a") + 1]
+
+
+@pytest.mark.parametrize("source", ["aac", "pcm_s24le"])
+def test_mxf_is_always_encoded_to_pcm(source):
+    plan = plan_conversion(probe((source, 1)), 2, ".mxf", encoder="aac")
+    assert plan["strategy"] == "reencode"
+    assert codec_of(plan).startswith("pcm_")
+
+
+def test_mxf_pad_keeps_pcm_depth():
+    plan = plan_conversion(probe(("pcm_s24le", 2)), 6, ".MXF", encoder="aac")
+    assert plan["strategy"] == "pad"
+    assert codec_of(plan) == "pcm_s24le"
+
+
+def test_mp4_uses_the_selected_encoder():
+    plan = plan_conversion(probe(("pcm_s16le", 1)), 2, ".mp4", encoder="aac_at")
+    assert codec_of(plan) == "aac_at"
+
+
+def test_mxf_already_at_target_is_copied():
+    assert plan_conversion(probe(("pcm_s16le", 2)), 2, ".mxf")["strategy"] == "copy"
@@ -0,0 +1,234 @@
+# watch.py
+# Watch-folder mode: convert proxies as they land in the input folder instead of in one batch
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# === inotify (Linux) ===
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+
+    def __init__(self, folder, recursive=False):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._libc = libc
+        self.folder = folder
+        self.recursive = recursive
+        self.overflowed = False
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}  # watch descriptor -> directory
+        self._add_tree(folder)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def _add_tree(self, directory):
+        self._add(directory)
+        if not self.recursive:
+            return
+        for root, dirs, _ in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for d in dirs:
+                self._add(os.path.join(root, d))
+
+    def poll(self, timeout):
+        # Returns absolute paths touched since the last call
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True  # kernel dropped events; caller should do one rescan
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO) and not os.path.basename(path).startswith("."):
+                    self._add_tree(path)
+                    # Files copied in before the watch existed would otherwise be missed
+                    for root, _, names in os.walk(path):
+                        paths.extend(os.path.join(root, n) for n in names)
+                continue
+            paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self._fd)
+
+
+# === Polling fallback ===
+class PollingWatcher:
+    def __init__(self, folder, list_files):
+        self.folder = folder
+        self.list_files = list_files
+        self.overflowed = False
+        self._seen = {}
+
+    def poll(self, timeout):
+        time.sleep(timeout)
+        changed = []
+        seen = {}
+        for rel in self.list_files():
+            path = os.path.join(self.folder, rel)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen[path] = (st.st_size, st.st_mtime_ns)
+            if self._seen.get(path) != seen[path]:
+                changed.append(path)
+        self._seen = seen
+        return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(folder, recursive, list_files):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folder, recursive)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(folder, list_files)
+
+
+class FolderWatch:
+    # Feeds files into the engine once they've stopped growing for `settle` seconds
+    def __init__(self, engine, settle=5.0, interval=1.0):
+        self.engine = engine
+        engine.keep_finished = False  # this can run for weeks; finished files shouldn't pile up in memory
+        self.settle = settle
+        self.interval = interval
+        self._stop = threading.Event()
+        self._pending = {}  # rel path -> (size, mtime_ns, unchanged since)
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def stop(self):
+        self._stop.set()
+        self.engine.cancel()
+
+    def _relative(self, path):
+        rel = os.path.relpath(path, self.engine.input_folder)
+        if rel.startswith(os.pardir) or not self.engine.matches(os.path.basename(rel)):
+            return None
+        if any(part.startswith(".") for part in rel.split(os.sep)):
+            return None
+        # Don't feed our own output back in when the output folder lives inside the input folder
+        output = os.path.abspath(self.engine.output_folder)
+        if os.path.abspath(path).startswith(output + os.sep):
+            return None
+        return rel
+
+    def _touch(self, rel):
+        self._pending.setdefault(rel, None)
+
+    def _rescan(self):
+        for rel in self.engine.iter_files():
+            self._touch(rel)
+
+    def _ready(self, now):
+        ready = []
+        for rel, seen in list(self._pending.items()):
+            try:
+                st = os.stat(os.path.join(self.engine.input_folder, rel))
+            except OSError:
+                del self._pending[rel]  # deleted or moved away before it settled
+                continue
+            if seen is None or seen[:2] != (st.st_size, st.st_mtime_ns):
+                self._pending[rel] = (st.st_size, st.st_mtime_ns, now)
+            elif now - seen[2] >= self.settle:
+                del self._pending[rel]
+                ready.append(rel)
+        return ready
+
+    def _job(self, rel):
+        try:
+            self.engine.convert_one(rel)
+        except Exception as e:
+            self.engine.log.emit(f"❌ Failed to process {rel}: {e}")
+        finally:
+            with self._lock:
+                self._active.discard(rel)
+
+    def run(self):
+        engine = self.engine
+        watcher = make_watcher(engine.input_folder, engine.recursive, engine.iter_files)
+        kind = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+        engine.log.emit(f"👀 Watching {engine.input_folder} ({kind}, {engine.max_jobs} jobs)\n")
+        engine.remove_partials()
+
+        self._rescan()
+
+        # Both kinds share one pool here; the engine's own limits decide how many actually run
+        pool = ThreadPoolExecutor(max_workers=engine.max_jobs + engine.copy_jobs)
+        last_save = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                for path in watcher.poll(self.interval if self._pending else 5.0):
+                    rel = self._relative(path)
+                    if rel:
+                        self._touch(rel)
+                if watcher.overflowed:
+                    watcher.overflowed = False
+                    self._rescan()
+
+                # With --shared, files another worker held get another look once they've settled again
+                for rel in engine.deferred_files():
+                    self._touch(rel)
+
+                now = time.monotonic()
+                for rel in self._ready(now):
+                    with self._lock:
+                        if rel in self._active:
+                            # Still converting an earlier version; look at it again once that finishes
+                            self._pending[rel] = None
+                            continue
+                        self._active.add(rel)
+                    pool.submit(self._job, rel)
+
+                if now - last_save > 60:
+                    engine.probe_cache.save()
+                    engine.save_manifests()
+                    last_save = now
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            watcher.close()
+            engine.close()
+            engine.probe_cache.save()
+        return engine.processed_count